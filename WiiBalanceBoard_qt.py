@@ -1,333 +1,47 @@
-import hid
-import time
-import struct
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
-from collections import deque # Import deque for efficient rolling average
-
-# --- Constants ---
-NINTENDO_VID = 0x057e
-WIIMOTE_PID = 0x0306
-READ_CALIBRATION_CMD = [0x17, 0x04, 0xA4, 0x00, 0x20, 0x00, 0x20]
-SET_DATA_MODE_REPORT = [0x12, 0x00, 0x32]
-SET_LED_REPORT = [0x11, 0x00]
-
-def _unpack_s16(byte1, byte2):
-    return struct.unpack('>h', bytes([byte1, byte2]))[0]
+from PyQt6.QtCore import QObject, pyqtSignal
+from wbb_board import ( # Re-exported for existing imports
+    BalanceBoard, SIGNALS, NINTENDO_VID, WIIMOTE_PID,
+    list_hid_boards, discover_boards, open_hid_device,
+)
 
 class WiiBalanceBoard(QObject):
     """
-    API for the Wii Balance Board, refactored as a QObject to run in a QThread
-    and emit signals for data, status, and errors.
+    Qt adapter around wbb_board.BalanceBoard, to run in a QThread and
+    re-emit the board's callbacks as Qt signals for the GUI. Samples don't
+    go through Qt; read self.sample_ring. Every other attribute (kernel,
+    is_tared, zero_point, ...) is the core's.
     """
     
     # --- Signals ---
-    data_received = pyqtSignal(dict) 
     status_update = pyqtSignal(str)
     ready_to_tare = pyqtSignal()
+    tare_progress = pyqtSignal(int) # Percent of TARE_DURATION elapsed
     tare_complete = pyqtSignal(bool)
     error_occurred = pyqtSignal(str)
-    # --- REMOVED ---
-    # board_button_pressed = pyqtSignal() 
+    rate_measured = pyqtSignal(float) # Achieved samples/sec, about once a second
+    zero_adjusted = pyqtSignal(float) # Drift (kg) absorbed since the last manual tare
     finished = pyqtSignal()
 
-    def __init__(self, config):
+    def __init__(self, config, **kwargs):
         super().__init__()
-        self.device = None
-        self.calibration = []
-        self.zero_point = []
-        self.running = True
-        self.is_tared = False
-        
-        # Load settings from config
-        self.READ_TIMEOUT_MS = 20
-        self.TARE_DURATION = config.get("tare_duration_sec", 3.0)
-        self.averaging_samples = config.get("averaging_samples", 5)
-        self.dead_zone_kg = config.get("dead_zone_kg", 0.2)
-        
-        # --- REMOVED ---
-        # self.prev_button_state = False 
-        
-        # --- For smoothing ---
-        self.tr_samples = deque(maxlen=self.averaging_samples)
-        self.br_samples = deque(maxlen=self.averaging_samples)
-        self.tl_samples = deque(maxlen=self.averaging_samples)
-        self.bl_samples = deque(maxlen=self.averaging_samples)
-
-    def _connect(self):
-        """Attempts to connect to the Balance Board."""
-        try:
-            self.device = hid.device()
-            self.device.open(NINTENDO_VID, WIIMOTE_PID)
-            self.device.set_nonblocking(1)
-            return True
-        except (IOError, hid.HIDException, Exception) as e:
-            self.error_occurred.emit(f"Connection failed: {e}")
-            return False
-
-    def _set_led(self, status=True):
-        """Sets the board's blue 'Player 1' LED on or off."""
-        if not self.device: return False
-        try:
-            payload = 0x10 if status else 0x00
-            self.device.write([0x11, payload])
-            return True
-        except Exception as e:
-            self.status_update.emit(f"Warning: Could not set LED. {e}")
-            return False
-
-    def _read_calibration(self):
-        """Reads and parses the 32-byte factory calibration data."""
-        if not self.device: return False
-        try:
-            self.device.write(READ_CALIBRATION_CMD)
-            data_packets = {}
-            start_time = time.time()
-            
-            while len(data_packets) < 2 and (time.time() - start_time) < 5.0:
-                data = self.device.read(64, timeout_ms=self.READ_TIMEOUT_MS) 
-                if not data or data[0] != 0x21:
-                    continue
-                
-                error_code = data[3] & 0x0F
-                if error_code != 0: 
-                    self.error_occurred.emit("Error reading calibration packet.")
-                    return False
-                
-                address = (data[4] << 8) | data[5]
-                if address == 0x0020:
-                    data_packets[0] = data[6:22]
-                elif address == 0x0030:
-                    data_packets[1] = data[6:22]
-            
-            if len(data_packets) != 2: 
-                self.error_occurred.emit("Calibration read timed out.")
-                return False
-
-            full_data = data_packets[0] + data_packets[1]
-            self._parse_calibration(full_data)
-            return True
-
-        except Exception as e:
-            self.error_occurred.emit(f"Calibration read failed: {e}")
-            return False
-
-    def _parse_calibration(self, data):
-        """Parses the 32-byte data into 3 calibration sets."""
-        cal_0kg = [
-            _unpack_s16(data[4], data[5]), _unpack_s16(data[6], data[7]),
-            _unpack_s16(data[8], data[9]), _unpack_s16(data[10], data[11])
-        ]
-        cal_17kg = [
-            _unpack_s16(data[12], data[13]), _unpack_s16(data[14], data[15]),
-            _unpack_s16(data[16], data[17]), _unpack_s16(data[18], data[19])
-        ]
-        cal_34kg = [
-            _unpack_s16(data[20], data[21]), _unpack_s16(data[22], data[23]),
-            _unpack_s16(data[24], data[25]), _unpack_s16(data[26], data[27])
-        ]
-        self.calibration = [cal_0kg, cal_17kg, cal_34kg]
-
-    def _set_data_mode(self):
-        """Tells the board to start streaming sensor data."""
-        if not self.device: return False
-        try:
-            self.device.write(SET_DATA_MODE_REPORT)
-            return True
-        except Exception as e:
-            self.error_occurred.emit(f"Failed to set data mode: {e}")
-            return False
+        self.core = BalanceBoard(config, **kwargs)
+        for name in SIGNALS:
+            getattr(self.core, name).connect(getattr(self, name).emit)
 
-    def _parse_sensor_data(self, data):
-        """Parses a 0x32 report and returns 4 raw sensor values."""
-        if data[0] != 0x32:
-            return None
-        
-        top_right = _unpack_s16(data[3], data[4])
-        bottom_right = _unpack_s16(data[5], data[6])
-        top_left = _unpack_s16(data[7], data[8])
-        bottom_left = _unpack_s16(data[9], data[10])
-        
-        return [top_right, bottom_right, top_left, bottom_left]
+    def __getattr__(self, name):
+        if name == "core": # Not set yet (during __init__)
+            raise AttributeError(name)
+        return getattr(self.core, name)
 
-    def perform_tare(self):
-        """
-        Public slot to be called to perform the "zeroing" (tare) operation.
-        Emits tare_complete(bool) signal when done.
-        """
-        if not self.device:
-            self.tare_complete.emit(False)
-            return
-
-        samples = [[], [], [], []] # 4 lists, one for each sensor
-        start_time = time.time()
-        
-        try:
-            while (time.time() - start_time) < self.TARE_DURATION:
-                data = self.device.read(64, timeout_ms=self.READ_TIMEOUT_MS)
-                if not data:
-                    continue
-                
-                sensor_data = self._parse_sensor_data(data)
-                if sensor_data:
-                    for i in range(4):
-                        samples[i].append(sensor_data[i])
-            
-            if not samples[0]:
-                self.tare_complete.emit(False)
-                return
-
-            # Average the samples for each sensor
-            self.zero_point = [sum(s) / len(s) for s in samples]
-            
-            # Clear smoothing buffers
-            self.tr_samples.clear()
-            self.br_samples.clear()
-            self.tl_samples.clear()
-            self.bl_samples.clear()
-
-            self.is_tared = True
-            self.tare_complete.emit(True)
-            
-        except Exception as e:
-            self.error_occurred.emit(f"Tare failed: {e}")
-            self.tare_complete.emit(False)
-
-    def _calculate_weights(self, raw_values):
-        """Interpolates raw sensor values to kg using calibration data."""
-        weights_kg = [0.0] * 4
-        if not self.calibration or not self.zero_point:
-            return weights_kg
-
-        for i in range(4):
-            raw_diff = raw_values[i] - self.zero_point[i]
-            
-            cal_0 = self.calibration[0][i]
-            cal_17 = self.calibration[1][i]
-            cal_34 = self.calibration[2][i]
-            
-            delta_17 = cal_17 - cal_0
-            delta_34 = cal_34 - cal_0
-            
-            if delta_17 != 0:
-                if raw_diff < delta_17:
-                    weights_kg[i] = 17.0 * (raw_diff / delta_17)
-                elif (delta_34 - delta_17) != 0:
-                    weights_kg[i] = 17.0 + 17.0 * ((raw_diff - delta_17) / (delta_34 - delta_17))
-                else:
-                    weights_kg[i] = 0
-            else:
-                 weights_kg[i] = 0
-
-            if weights_kg[i] < 0:
-                weights_kg[i] = 0.0
-        
-        # [TR, BR, TL, BL]
-        return weights_kg
-
-    def _get_processed_data(self, weights):
-        """
-        Calculates Total Weight and CoM from the provided weights.
-        """
-        tr, br, tl, bl = weights
-        total_kg = sum(weights)
-        
-        if total_kg < self.dead_zone_kg:
-            total_kg = 0.0
-            tr = br = tl = bl = 0.0
-            x_pos, y_pos = 0.0, 0.0
-        else:
-            # X-axis: (Right - Left)
-            x_pos = ((tr + br) - (tl + bl)) / total_kg
-            # Y-axis: (Top - Bottom)
-            y_pos = ((tr + tl) - (br + bl)) / total_kg
-            
-            # Clamp CoM to -1.0 to 1.0
-            x_pos = max(-1.0, min(1.0, x_pos))
-            y_pos = max(-1.0, min(1.0, y_pos))
-        
-        return {
-            "total_kg": total_kg,
-            "quadrants_kg": {
-                "top_right": tr, "bottom_right": br,
-                "top_left": tl, "bottom_left": bl,
-            },
-            "center_of_mass": (x_pos, y_pos)
-        }
-        
+    # A method of this QObject (not the core's), so QThread.started runs it on the board thread
     def start_processing_loop(self):
-        """
-        NEW: This is the main processing loop that the QThread will run.
-        """
-        try:
-            # --- 1. Connect ---
-            self.status_update.emit("Connecting to Wii Balance Board...")
-            if not self._connect():
-                return
-            
-            # --- 2. Set LED ---
-            self.status_update.emit("Connected. Setting LED...")
-            self._set_led(True) # Turn on the solid blue light
-            
-            # --- 3. Calibrate ---
-            self.status_update.emit("Reading calibration data...")
-            if not self._read_calibration():
-                return
-
-            # --- 4. Set Mode ---
-            self.status_update.emit("Setting data mode...")
-            if not self._set_data_mode():
-                return
-            
-            # --- 5. Ready to Tare ---
-            self.status_update.emit("Board ready. Click 'Tare (Zero)' or press board button.")
-            self.ready_to_tare.emit()
-
-            # --- 6. Weighing Loop ---
-            while self.running:
-                if self.is_tared and self.device:
-                    data = self.device.read(64, timeout_ms=self.READ_TIMEOUT_MS)
-                    if not data:
-                        continue
-                    
-                    # --- REMOVED: Button Press Detection ---
-                    # if data[0] in (0x30, 0x31, 0x32, 0x34, 0x35, 0x36, 0x37):
-                    #     ...
-                    
-                    sensor_data = self._parse_sensor_data(data)
-                    if sensor_data:
-                        # --- Smoothing ---
-                        raw_weights_kg = self._calculate_weights(sensor_data)
-                        self.tr_samples.append(raw_weights_kg[0])
-                        self.br_samples.append(raw_weights_kg[1])
-                        self.tl_samples.append(raw_weights_kg[2])
-                        self.bl_samples.append(raw_weights_kg[3])
-                        
-                        if not self.tr_samples: continue # Wait for buffers to fill
+        self.core.start_processing_loop()
 
-                        averaged_weights = [
-                            sum(self.tr_samples) / len(self.tr_samples),
-                            sum(self.br_samples) / len(self.br_samples),
-                            sum(self.tl_samples) / len(self.tl_samples),
-                            sum(self.bl_samples) / len(self.bl_samples)
-                        ]
-                        
-                        processed_data = self._get_processed_data(averaged_weights)
-                        self.data_received.emit(processed_data)
-                        
-                else:
-                    # Sleep if not tared to prevent busy-looping
-                    time.sleep(0.1)
+    def request_tare(self):
+        self.core.request_tare()
 
-        except Exception as e:
-            if self.running:
-                self.error_occurred.emit(f"❌ Error: {e}")
-        finally:
-            if self.device:
-                self._set_led(False)
-                self.device.close()
-            self.status_update.emit("Disconnected.")
-            self.finished.emit() # Tell the thread we are done
+    def attach_recorder(self, recorder):
+        self.core.attach_recorder(recorder)
 
     def stop_processing(self):
-        """Stops the processing loop."""
-        self.running = False
\ No newline at end of file
+        self.core.stop_processing()
@@ -1,20 +1,71 @@
+import time
+STARTUP_T0 = time.perf_counter() # Before the heavy imports, for the startup report
 import sys
 import json
-import vgamepad as vg
+import argparse
 import glob
 import os
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QFrame, QDoubleSpinBox, QGridLayout, QComboBox, QScrollArea
+    QPushButton, QFrame, QDoubleSpinBox, QSpinBox, QCheckBox, QGridLayout, QComboBox, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread
+from PyQt6.QtCore import Qt, QThread, QTimer
 from PyQt6.QtGui import QFont
-from WiiBalanceBoard_qt import WiiBalanceBoard # Import the Qt-enabled API
-from wbb_visuals import CoMWidget # Stylesheets are removed from here
+from WiiBalanceBoard_qt import WiiBalanceBoard, open_hid_device, list_hid_boards, discover_boards # Import the Qt-enabled API
+from wbb_visuals import CoMWidget, CompiledTheme # Stylesheets are removed from here
+from wbb_input_engine import GamepadEngine, OutputScheduler, load_vgamepad, DEFAULT_PRESS_DETECTION
+from wbb_backends import device_factory, CaptureDevice, StubGamepad
+from wbb_latency import LatencyStats, STAGES
+from wbb_samples import SampleRing
+from wbb_session import SessionRecorder
+from wbb_cache import CalibrationCache
 
 # --- Folder Constants ---
 PROFILES_DIR = "profiles"
 THEMES_DIR = "themes"
+DIAGNOSTICS_DIR = "diagnostics"
+SESSIONS_DIR = "sessions"
+CACHE_DIR = "cache"
+
+STARTUP_REPORT_TIMEOUT_MS = 15000 # Report even if no sample arrives (e.g. waiting for a tare)
+
+class BoardSlot:
+    """
+    Everything one balance board owns: its profile, board thread, sample
+    ring, latency stats, virtual gamepad and engine. Boards share nothing
+    on the hot path except the OutputScheduler thread, which only ever
+    resolves each board's newest sample, so adding a board doesn't queue
+    work in front of the others.
+    """
+    def __init__(self, index, device_spec="hid", device_path=None):
+        self.index = index
+        self.name = f"Board {index + 1}"
+        self.device_spec = device_spec
+        self.device_path = device_path # HID path when several physical boards are connected
+        
+        # --- Profile ---
+        self.config = {}
+        self.current_profile_file = ""
+        self.thresholds = {}
+        self.press_detection = {}
+        self.button_mappings = {}
+        self.combination_mappings = {}
+        
+        # --- Pipeline ---
+        self.gamepad = None
+        self.engine = None
+        self.latency_stats = LatencyStats() # Per board: each stage has one writer thread
+        self.sample_ring = SampleRing()
+        self.display_cursor = self.sample_ring.cursor()
+        self.processing_thread = None
+        self.board = None
+        self.recorder = None # Active SessionRecorder, if any
+        
+        # --- Last reported state, restored when the board is selected ---
+        self.status = "Initializing..."
+        self.ready = False # Tare button enabled
+        self.rate_hz = 0.0
+        self.drift_text = "Zero drift: --"
 
 class BalanceBoardApp(QWidget):
     
@@ -43,10 +94,6 @@ class BalanceBoardApp(QWidget):
         "None": None
     }
     
-    ALL_DPAD_BUTTONS = {
-        "DPAD_UP", "DPAD_DOWN", "DPAD_LEFT", "DPAD_RIGHT"
-    }
-
     # --- Data for Loops ---
     QUADRANT_KEYS = ("top_left", "bottom_left", "top_right", "bottom_right")
     
@@ -55,69 +102,63 @@ class BalanceBoardApp(QWidget):
         "top_left_bottom_left", "top_right_bottom_right",
         "top_left_bottom_right", "top_right_bottom_left"
     )
-
-    COMBO_DEFINITIONS = [
-        ({"top_left", "top_right"}, "top_left_top_right"),
-        ({"bottom_left", "bottom_right"}, "bottom_left_bottom_right"),
-        ({"top_left", "bottom_left"}, "top_left_bottom_left"),
-        ({"top_right", "bottom_right"}, "top_right_bottom_right"),
-        ({"top_left", "bottom_right"}, "top_left_bottom_right"),
-        ({"top_right", "bottom_left"}, "top_right_bottom_left"),
-    ]
-
-    COMBO_ACTIONS = {
-        "LS_UP": (0, 32767, None),
-        "LS_DOWN": (0, -32767, None),
-        "LS_LEFT": (-32767, 0, None),
-        "LS_RIGHT": (32767, 0, None),
-        "LS_UP_LEFT": (-32767, 32767, None),
-        "LS_UP_RIGHT": (32767, 32767, None),
-        "LS_DOWN_LEFT": (-32767, -32767, None),
-        "LS_DOWN_RIGHT": (32767, -32767, None),
-        "DPAD_UP": (0, 0, "DPAD_UP"),
-        "DPAD_DOWN": (0, 0, "DPAD_DOWN"),
-        "DPAD_LEFT": (0, 0, "DPAD_LEFT"),
-        "DPAD_RIGHT": (0, 0, "DPAD_RIGHT"),
-    }
     
-    def __init__(self):
+    def __init__(self, device_specs=("hid",), capture_path=None):
         super().__init__()
-        self.config = {}
-        self.thresholds = {}
-        self.button_mappings = {}
-        self.combination_mappings = {}
+        self.capture_path = capture_path
         
         self.profile_files = []
-        self.current_profile_file = ""
+        self.initial_profile_file = "" # Profile given to boards when they're added
         
-        self.themes = {} 
+        self.themes = {} # name -> CompiledTheme, or None until first applied
         self.current_theme_name = "light"
+        self.applied_theme = None # CompiledTheme currently on screen
         
         self.REVERSE_VGAMEPAD_MAP = {v: k for k, v in self.VGAMEPAD_BUTTON_MAP.items()}
         self.REVERSE_VGAMEPAD_COMBO_MAP = {v: k for k, v in self.VGAMEPAD_COMBO_MAP.items()}
         
         self.button_view_mode = "xbox"
         
-        self.processing_thread = None
-        self.board = None
+        self._startup_marks = [("imports", time.perf_counter())] # None once reported
+        
+        # Gamepad output for every board runs on one thread, reading the rings directly
+        self.output_scheduler = OutputScheduler()
+        
+        # Calibration + last tare per board, so reconnects skip both
+        self.calibration_cache = CalibrationCache(os.path.join(CACHE_DIR, "boards.json"))
+        self._label_text_cache = {}
         
         self.ensure_folders_exist() # Create profiles/ and themes/
         
-        self.init_ui()
+        # --- Boards first: they connect and calibrate while the window is built ---
+        # One slot per board; the panels edit and show the selected one
+        self.slots = []
+        for spec, path in discover_boards(device_specs):
+            self.slots.append(self._create_slot(spec, path))
+        self.slot = self.slots[0]
+        self.initial_profile_file = self._find_initial_profile()
+        for slot in self.slots:
+            self._load_slot_profile(slot, self.initial_profile_file)
+        self.output_scheduler.start()
+        for slot in self.slots:
+            self._create_and_start_thread(slot)
+        self._startup_mark("boards started")
         
-        self.scan_and_load_themes()
-        self.scan_and_load_profiles() # Loads config, which sets theme
+        # Virtual pads next (loads ViGEm); engines skip output until theirs is set
+        for slot in self.slots:
+            slot.gamepad = slot.engine.gamepad = self._create_gamepad(slot)
+        self._startup_mark("gamepads")
         
-        self.update_all_com_labels()
-        self._create_and_start_thread()
+        self.init_ui()
+        self._startup_mark("widgets")
         
-        try:
-            self.gamepad = vg.VX360Gamepad()
-            print("Virtual Xbox 360 gamepad initialized.")
-        except Exception as e:
-            print(f"Could not initialize virtual gamepad: {e}")
-            print("Please ensure ViGEmBus driver is installed.")
-            self.gamepad = None
+        self.scan_and_load_themes() # Names only; a theme is parsed when applied
+        self.scan_and_load_profiles() # Names only; profiles are parsed when selected
+        self._show_config(self.slot)
+        self._refresh_board_combo()
+        self.update_all_com_labels()
+        self._startup_mark("window ready")
+        QTimer.singleShot(STARTUP_REPORT_TIMEOUT_MS, self._startup_report)
 
     def init_ui(self):
         self.setWindowTitle("Wii Balance Board Monitor (PyQt6)")
@@ -137,6 +178,14 @@ class BalanceBoardApp(QWidget):
         main_layout.setContentsMargins(15, 15, 15, 15)
         main_layout.setSpacing(10)
         
+        # --- Board Selection (hidden with a single board) ---
+        self.board_frame = QFrame()
+        self.board_frame.setFrameShape(QFrame.Shape.StyledPanel)
+        board_layout = QHBoxLayout(self.board_frame)
+        board_layout.addWidget(QLabel("Board:"))
+        self.board_combo = QComboBox()
+        board_layout.addWidget(self.board_combo, 1)
+        
         # --- Profile (Config) Selection ---
         profile_frame = QFrame()
         profile_frame.setFrameShape(QFrame.Shape.StyledPanel)
@@ -222,6 +271,24 @@ class BalanceBoardApp(QWidget):
 
         for key, spin_box in self.spin_widgets.items():
             spin_box.valueChanged.connect(lambda v, k=key: self.on_threshold_changed(k, v))
+        
+        # --- Press Detection (hysteresis / debounce) ---
+        self.spin_hysteresis = QDoubleSpinBox(decimals=1, minimum=0.0, maximum=20.0, singleStep=0.5, suffix=" kg")
+        self.spin_min_hold = QSpinBox(minimum=0, maximum=500, singleStep=10, suffix=" ms")
+        self.fast_press_check = QCheckBox("Fast press (unsmoothed)")
+        self.spin_hysteresis.setToolTip("A pressed corner releases this far below its threshold")
+        self.spin_min_hold.setToolTip("Presses are held at least this long")
+        self.fast_press_check.setToolTip("Press on the raw load instead of the averaged one")
+        
+        threshold_layout.addWidget(create_label("Hysteresis:"), 3, 0)
+        threshold_layout.addWidget(self.spin_hysteresis, 3, 1)
+        threshold_layout.addWidget(create_label("Min Hold:"), 3, 2)
+        threshold_layout.addWidget(self.spin_min_hold, 3, 3)
+        threshold_layout.addWidget(self.fast_press_check, 4, 0, 1, 4)
+        
+        self.spin_hysteresis.valueChanged.connect(lambda v: self.on_press_detection_changed("hysteresis_kg", v))
+        self.spin_min_hold.valueChanged.connect(lambda v: self.on_press_detection_changed("min_hold_ms", v))
+        self.fast_press_check.toggled.connect(lambda v: self.on_press_detection_changed("fast_press", v))
 
         # --- Button Mapping Frame ---
         mapping_frame = QFrame()
@@ -292,12 +359,48 @@ class BalanceBoardApp(QWidget):
         combo_mapping_layout.addWidget(create_label("Top-Right + Bottom-Left:"), 6, 0)
         combo_mapping_layout.addWidget(self.combo_tr_bl, 6, 1)
 
+        # --- Latency Diagnostics Frame ---
+        diagnostics_frame = QFrame()
+        diagnostics_frame.setFrameShape(QFrame.Shape.StyledPanel)
+        diagnostics_layout = QGridLayout(diagnostics_frame)
+        diagnostics_layout.setSpacing(4)
+        diagnostics_layout.setContentsMargins(8, 8, 8, 8)
+        diagnostics_layout.addWidget(QLabel("Latency (µs):"), 0, 0)
+        for col, header in enumerate(("p50", "p95", "p99"), start=1):
+            diagnostics_layout.addWidget(create_label(header), 0, col)
+        
+        self.latency_labels = {}
+        for row, stage in enumerate(STAGES, start=1):
+            diagnostics_layout.addWidget(create_label(stage.capitalize()), row, 0)
+            labels = []
+            for col in range(1, 4):
+                lbl = create_label("--")
+                diagnostics_layout.addWidget(lbl, row, col)
+                labels.append(lbl)
+            self.latency_labels[stage] = labels
+        
+        self.flush_label = create_label("Gamepad flushes: -- sent, -- skipped")
+        diagnostics_layout.addWidget(self.flush_label, len(STAGES) + 1, 0, 1, 4)
+        self.ring_label = create_label("Sample ring: --")
+        diagnostics_layout.addWidget(self.ring_label, len(STAGES) + 2, 0, 1, 4)
+        self.filter_label = create_label("Filter: --")
+        diagnostics_layout.addWidget(self.filter_label, len(STAGES) + 3, 0, 1, 4)
+        self.drift_label = create_label("Zero drift: --")
+        diagnostics_layout.addWidget(self.drift_label, len(STAGES) + 4, 0, 1, 4)
+        self.boards_label = create_label("Boards: --") # Throughput of every board, one per line
+        diagnostics_layout.addWidget(self.boards_label, len(STAGES) + 5, 0, 1, 4)
+        
+        self.export_latency_button = QPushButton("Export Latency Report")
+        self.export_latency_button.setFont(QFont("Helvetica", 10))
+        diagnostics_layout.addWidget(self.export_latency_button, len(STAGES) + 6, 0, 1, 4)
+
         # --- Main Buttons ---
         self.tare_button = QPushButton("Tare (Zero)")
         self.save_button = QPushButton("Save Profile")
         self.rescan_button = QPushButton("Rescan for Board")
+        self.record_button = QPushButton("Start Recording")
         
-        for btn in [self.tare_button, self.save_button, self.rescan_button]:
+        for btn in [self.tare_button, self.save_button, self.rescan_button, self.record_button]:
             btn.setFont(QFont("Helvetica", 11, QFont.Weight.Bold))
             btn.setMinimumHeight(35)
             
@@ -309,13 +412,18 @@ class BalanceBoardApp(QWidget):
         
         button_layout_2 = QHBoxLayout()
         button_layout_2.addWidget(self.rescan_button)
+        button_layout_2.addWidget(self.record_button)
         
         self.status_label = QLabel("Initializing...")
         self.status_label.setObjectName("status_label") # Set object name for QSS
         self.status_label.setFont(QFont("Helvetica", 10))
         self.status_label.setStyleSheet("border-top: 1px solid #CCC; padding: 5px;")
         
+        self.rate_label = QLabel("Rate: -- Hz")
+        self.rate_label.setFont(QFont("Helvetica", 9))
+        
         # --- Add Widgets to Layout ---
+        main_layout.addWidget(self.board_frame)
         main_layout.addWidget(profile_frame) 
         main_layout.addWidget(theme_frame)   
         main_layout.addWidget(total_weight_header)
@@ -328,10 +436,12 @@ class BalanceBoardApp(QWidget):
         main_layout.addWidget(threshold_frame)
         main_layout.addWidget(mapping_frame)
         main_layout.addWidget(combo_mapping_frame)
+        main_layout.addWidget(diagnostics_frame)
         main_layout.addStretch()
         main_layout.addLayout(button_layout_1)
         main_layout.addLayout(button_layout_2)
         main_layout.addWidget(self.status_label)
+        main_layout.addWidget(self.rate_label)
 
         scroll_area.setWidget(scroll_widget)
         outer_layout.addWidget(scroll_area)
@@ -340,38 +450,145 @@ class BalanceBoardApp(QWidget):
         self.tare_button.clicked.connect(self.on_tare_click)
         self.save_button.clicked.connect(self.save_profile)
         self.rescan_button.clicked.connect(self.on_rescan_click)
+        self.record_button.clicked.connect(self.on_record_click)
         self.toggle_view_button.clicked.connect(self.on_toggle_view)
+        self.export_latency_button.clicked.connect(self.export_latency_report)
         
         self.profile_combo.currentTextChanged.connect(self.on_profile_selected)
         self.theme_combo.currentTextChanged.connect(self.on_theme_selected)
+        self.board_combo.currentIndexChanged.connect(self.on_board_selected)
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_display)
+        self.refresh_timer.start(1000 // 60)
         
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+        self.diagnostics_timer.start(1000)
 
-    def _create_and_start_thread(self):
-        if self.processing_thread:
-             self.processing_thread.finished.disconnect(self._create_and_start_thread)
+    def _create_slot(self, device_spec, device_path=None):
+        """
+        New BoardSlot with its own engine, registered with the output
+        scheduler. The gamepad is set later (see _create_gamepad).
+        """
+        slot = BoardSlot(len(self.slots), device_spec, device_path)
+        slot.engine = GamepadEngine(None, latency_stats=slot.latency_stats)
+        self.output_scheduler.add(slot.engine, slot.sample_ring)
+        return slot
 
-        self.processing_thread = QThread()
+    def _create_gamepad(self, slot):
+        """One virtual Xbox 360 pad per board."""
+        try:
+            vg = load_vgamepad()
+            if vg is None:
+                raise RuntimeError("vgamepad could not be loaded")
+            gamepad = vg.VX360Gamepad()
+            print(f"{slot.name}: Virtual Xbox 360 gamepad initialized.")
+            return gamepad
+        except Exception as e:
+            print(f"Could not initialize virtual gamepad: {e}")
+            print("Please ensure ViGEmBus driver is installed.")
+            if slot.device_spec != "hid":
+                # Replay/synthetic runs still exercise the mapping logic
+                print("Using a stub gamepad for the simulated board.")
+                return StubGamepad()
+            return None
+
+    def _add_slot(self, device_spec, device_path=None):
+        """Adds a board at runtime with the initial profile and starts its thread."""
+        slot = self._create_slot(device_spec, device_path)
+        self.slots.append(slot)
+        self._load_slot_profile(slot, self.initial_profile_file)
+        self._refresh_board_combo()
+        self._create_and_start_thread(slot)
+        slot.gamepad = slot.engine.gamepad = self._create_gamepad(slot)
+        return slot
+
+    def _refresh_board_combo(self):
+        self.board_combo.blockSignals(True)
+        self.board_combo.clear()
+        for slot in self.slots:
+            label = slot.name if slot.device_spec == "hid" else f"{slot.name} ({slot.device_spec})"
+            self.board_combo.addItem(label)
+        self.board_combo.setCurrentIndex(self.slot.index)
+        self.board_combo.blockSignals(False)
+        self.board_frame.setVisible(len(self.slots) > 1)
+
+    def on_board_selected(self, index):
+        """Points the panels at another board."""
+        if index < 0 or index >= len(self.slots):
+            return
+        self.slot = slot = self.slots[index]
+        
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.setCurrentText(os.path.basename(slot.current_profile_file))
+        self.profile_combo.blockSignals(False)
+        self._show_config(slot)
+        
+        self.set_status(slot.status)
+        self.tare_button.setEnabled(slot.ready)
+        self.record_button.setText("Stop Recording" if slot.recorder else "Start Recording")
+        self._set_label_text(self.drift_label, slot.drift_text)
+        self._show_rate(slot)
+        self.refresh_diagnostics()
+
+    def _create_and_start_thread(self, slot):
+        # (The Rescan restart is a SingleShotConnection; nothing to disconnect here)
+        slot.processing_thread = QThread()
         # Pass the whole config dict to the board
-        self.board = WiiBalanceBoard(self.config)
+        slot.board = WiiBalanceBoard(
+            slot.config, sample_ring=slot.sample_ring,
+            latency_stats=slot.latency_stats, device_factory=self._make_device_factory(slot),
+            calibration_cache=self.calibration_cache, device_path=slot.device_path
+        )
+        board = slot.board
+        
+        if slot.recorder:
+            board.attach_recorder(slot.recorder)
         
-        self.board.moveToThread(self.processing_thread)
+        board.moveToThread(slot.processing_thread)
         
-        self.board.data_received.connect(self.update_gui)
-        self.board.status_update.connect(self.set_status)
-        self.board.error_occurred.connect(self.handle_error)
+        board.status_update.connect(lambda text: self.set_status(text, slot))
+        board.error_occurred.connect(lambda text: self.handle_error(slot, text))
+        board.rate_measured.connect(lambda rate_hz: self.on_rate_measured(slot, rate_hz))
+        board.zero_adjusted.connect(lambda drift_kg: self.on_zero_adjusted(slot, drift_kg))
         
-        self.board.ready_to_tare.connect(lambda: self.tare_button.setEnabled(True))
-        self.board.ready_to_tare.connect(lambda: self.rescan_button.setEnabled(True))
-        self.board.tare_complete.connect(self.on_tare_complete)
+        board.ready_to_tare.connect(lambda: self.on_ready_to_tare(slot))
+        board.tare_progress.connect(lambda percent: self.on_tare_progress(slot, percent))
+        board.tare_complete.connect(lambda success: self.on_tare_complete(slot, success))
         
-        self.processing_thread.started.connect(self.board.start_processing_loop)
-        self.board.finished.connect(self.processing_thread.quit)
-        self.board.finished.connect(self.board.deleteLater)
-        self.processing_thread.finished.connect(self.processing_thread.deleteLater)
+        thread = slot.processing_thread
+        thread.started.connect(board.start_processing_loop)
+        board.finished.connect(thread.quit)
+        board.finished.connect(board.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.finished.connect(lambda: self._forget_thread(slot, thread))
         
-        self.processing_thread.start()
-        self.rescan_button.setEnabled(True)
+        thread.start()
 
+    def _forget_thread(self, slot, thread):
+        """Drops references to a finished (and soon deleted) board thread."""
+        if slot.processing_thread is thread:
+            slot.processing_thread = None
+            slot.board = None
+
+    def _make_device_factory(self, slot):
+        """Device for the next board thread: physical, replay or synthetic, optionally captured."""
+        factory = device_factory(slot.device_spec)
+        if factory is None and slot.device_path:
+            factory = lambda: open_hid_device(slot.device_path)
+        if not self.capture_path:
+            return factory
+        
+        capture_path = self.capture_path
+        if slot.index:
+            # One capture file per board: session.cap, session_board2.cap, ...
+            root, ext = os.path.splitext(capture_path)
+            capture_path = f"{root}_board{slot.index + 1}{ext}"
+        
+        def open_captured():
+            return CaptureDevice((factory or open_hid_device)(), capture_path)
+        return open_captured
     
     def _create_file_if_not_exists(self, path, data, is_json=True):
         """Helper to create a default file."""
@@ -412,24 +629,46 @@ class BalanceBoardApp(QWidget):
         self._create_file_if_not_exists(dark_theme_path, dark_theme)
 
     def scan_and_load_themes(self):
-        """Scans the themes/ folder and populates the theme dropdown."""
-        self.themes = {}
+        """Scans the themes/ folder and populates the theme dropdown; files are parsed on first use."""
         theme_files = sorted(glob.glob(os.path.join(THEMES_DIR, "*.json")))
+        self.themes = {os.path.basename(f_path).replace(".json", ""): None for f_path in theme_files}
         
-        theme_names = []
-        for f_path in theme_files:
-            theme_name = os.path.basename(f_path).replace(".json", "")
+        # Filling the combo selects its first item; that's not a theme choice
+        try:
+            self.theme_combo.currentTextChanged.disconnect(self.on_theme_selected)
+        except TypeError:
+            pass
+        self.theme_combo.addItems(self.themes.keys())
+        self.theme_combo.currentTextChanged.connect(self.on_theme_selected)
+
+    def _compiled_theme(self, theme_name):
+        """CompiledTheme for a theme, parsed and compiled the first time it's applied."""
+        if self.themes.get(theme_name) is None:
+            f_path = os.path.join(THEMES_DIR, f"{theme_name}.json")
             try:
                 with open(f_path, "r") as f:
-                    self.themes[theme_name] = json.load(f)
-                theme_names.append(theme_name)
+                    self.themes[theme_name] = CompiledTheme(json.load(f))
             except Exception as e:
                 print(f"Failed to load theme {f_path}: {e}")
-        
-        self.theme_combo.addItems(theme_names)
+                return None
+        return self.themes[theme_name]
+
+    def _find_initial_profile(self):
+        """user_config.json, else default_config.json, else the first profile; "" if there are none."""
+        basenames = [os.path.basename(f) for f in sorted(glob.glob(os.path.join(PROFILES_DIR, "*.json")))]
+        for name in ("user_config.json", "default_config.json"):
+            if name in basenames:
+                return os.path.join(PROFILES_DIR, name)
+        return os.path.join(PROFILES_DIR, basenames[0]) if basenames else ""
+
+    def _load_slot_profile(self, slot, full_path):
+        """Parses a profile for one board and compiles its engine; built-in defaults without one."""
+        slot.current_profile_file = full_path
+        slot.config = self.load_config_file(full_path) if full_path else self._get_built_in_defaults()
+        self._apply_config(slot)
 
     def scan_and_load_profiles(self):
-        """Scans the profiles/ folder and loads the initial profile."""
+        """Scans the profiles/ folder into the dropdown and selects the shown board's profile."""
         self.profile_files = sorted(glob.glob(os.path.join(PROFILES_DIR, "*.json")))
         
         try:
@@ -441,26 +680,11 @@ class BalanceBoardApp(QWidget):
         
         basenames = [os.path.basename(f) for f in self.profile_files]
         self.profile_combo.addItems(basenames)
-        
-        user_profile_name = "user_config.json"
-        default_profile_name = "default_config.json"
-        
-        initial_file_name = default_profile_name
-        if user_profile_name in basenames:
-            initial_file_name = user_profile_name
-        elif basenames:
-            initial_file_name = basenames[0]
-        else:
+        if not basenames:
             self.set_status(f"❌ ERROR: No profiles found in /{PROFILES_DIR}!")
-            self.config = self._get_built_in_defaults()
-            self.update_ui_from_config()
-            return
-            
-        self.profile_combo.setCurrentText(initial_file_name)
         
-        self.current_profile_file = os.path.join(PROFILES_DIR, initial_file_name) 
-        self.config = self.load_config_file(self.current_profile_file)
-        self.update_ui_from_config()
+        # Every board starts on the same profile (see __init__); each can pick its own afterwards
+        self.profile_combo.setCurrentText(os.path.basename(self.slot.current_profile_file))
         
         self.profile_combo.currentTextChanged.connect(self.on_profile_selected)
 
@@ -483,21 +707,36 @@ class BalanceBoardApp(QWidget):
             return
             
         full_path = os.path.join(PROFILES_DIR, filename_basename)
-        print(f"Loading profile: {full_path}")
-        self.current_profile_file = full_path
-        self.config = self.load_config_file(full_path)
+        print(f"Loading profile for {self.slot.name}: {full_path}")
+        self.slot.current_profile_file = full_path
+        self.slot.config = self.load_config_file(full_path)
         
         self.update_ui_from_config() 
-        self.set_status(f"✅ Loaded {filename_basename}")
+        self.set_status(f"✅ Loaded {filename_basename}", self.slot)
 
     def update_ui_from_config(self):
-        """Populates all UI widgets based on the currently loaded self.config."""
-        self.thresholds = self.config.get("button_thresholds_kg", {})
-        self.button_mappings = self.config.get("button_mappings", {})
-        self.combination_mappings = self.config.get("combination_mappings", {})
+        """Applies the selected board's config and populates all UI widgets from it."""
+        self._apply_config(self.slot)
+        self._show_config(self.slot)
+
+    def _apply_config(self, slot):
+        """Splits a board's config into its editable dicts and compiles its engine."""
+        slot.thresholds = slot.config.get("button_thresholds_kg", {})
+        slot.button_mappings = slot.config.get("button_mappings", {})
+        slot.combination_mappings = slot.config.get("combination_mappings", {})
+        slot.press_detection = dict(DEFAULT_PRESS_DETECTION, **slot.config.get("press_detection", {}))
+        slot.engine.set_profile(
+            slot.thresholds, slot.button_mappings, slot.combination_mappings, slot.press_detection
+        )
+
+    def _show_config(self, slot):
+        """Populates all UI widgets from a board's (already applied) config."""
+        # Widget setters below fire the change slots; they write the same values back
+        refresh_hz = max(1, slot.config.get("gui_refresh_hz", 60))
+        self.refresh_timer.setInterval(int(1000 / refresh_hz))
         
         # --- Theme Handling ---
-        theme_name = self.config.get("theme", "light")
+        theme_name = slot.config.get("theme", "light")
         if theme_name not in self.themes:
             print(f"Warning: Theme '{theme_name}' not found. Defaulting to 'light'.")
             theme_name = "light"
@@ -513,17 +752,21 @@ class BalanceBoardApp(QWidget):
         
         # --- Other UI Elements ---
         for key, spin_box in self.spin_widgets.items():
-            spin_box.setValue(self.thresholds.get(key, 10.0))
+            spin_box.setValue(slot.thresholds.get(key, 10.0))
+        
+        self.spin_hysteresis.setValue(slot.press_detection["hysteresis_kg"])
+        self.spin_min_hold.setValue(int(slot.press_detection["min_hold_ms"]))
+        self.fast_press_check.setChecked(bool(slot.press_detection["fast_press"]))
 
         for key, combo_box in self.mapping_combos.items():
-            combo_box.setCurrentText(self.REVERSE_VGAMEPAD_MAP.get(self.button_mappings.get(key), "None"))
+            combo_box.setCurrentText(self.REVERSE_VGAMEPAD_MAP.get(slot.button_mappings.get(key), "None"))
 
         for key, combo_box in self.combo_combos_widgets.items():
-            combo_box.setCurrentText(self.REVERSE_VGAMEPAD_COMBO_MAP.get(self.combination_mappings.get(key), "None"))
+            combo_box.setCurrentText(self.REVERSE_VGAMEPAD_COMBO_MAP.get(slot.combination_mappings.get(key), "None"))
 
         self.apply_theme() # Apply the theme
         self.update_all_com_labels()
-        self.com_widget.update_threshold_indicators(self.thresholds)
+        self.com_widget.update_threshold_indicators(slot.thresholds)
         
     def _get_built_in_defaults(self):
         """Fallback config if all files are missing/corrupt."""
@@ -531,13 +774,16 @@ class BalanceBoardApp(QWidget):
         return {
             "tare_duration_sec": 3.0,
             "polling_rate_hz": 30,
+            "scheduling_mode": "event",
             "averaging_samples": 5,
             "dead_zone_kg": 0.2,
+            "filter": "moving_average",
             "theme": "light",
             "button_thresholds_kg": {
                 "top_left": 10.0, "bottom_left": 10.0,
                 "top_right": 10.0, "bottom_right": 10.0
             },
+            "press_detection": dict(DEFAULT_PRESS_DETECTION),
             "button_mappings": {
               "top_left": "XUSB_GAMEPAD_A",
               "bottom_left": "XUSB_GAMEPAD_B",
@@ -553,15 +799,46 @@ class BalanceBoardApp(QWidget):
 
     
     def on_rescan_click(self):
-        self.set_status("Rescanning...")
+        """Restarts the selected board and adds any board connected since."""
+        slot = self.slot
+        self.set_status("Rescanning...", slot)
+        slot.ready = False
         self.tare_button.setEnabled(False)
         self.rescan_button.setEnabled(False)
         
-        if self.processing_thread and self.processing_thread.isRunning():
-            self.processing_thread.finished.connect(self._create_and_start_thread, Qt.ConnectionType.SingleShotConnection)
-            self.board.stop_processing()
+        self._add_new_hid_boards()
+        if slot.processing_thread and slot.processing_thread.isRunning():
+            slot.processing_thread.finished.connect(
+                lambda: self._restart_board(slot), Qt.ConnectionType.SingleShotConnection
+            )
+            slot.board.stop_processing()
         else:
-            self._create_and_start_thread()
+            self._restart_board(slot)
+
+    def _restart_board(self, slot):
+        self._create_and_start_thread(slot)
+        if slot is self.slot:
+            self.rescan_button.setEnabled(True)
+
+    def _add_new_hid_boards(self):
+        """Gives every physical board that no slot owns yet its own slot."""
+        if not any(slot.device_spec == "hid" for slot in self.slots):
+            return
+        try:
+            paths = list_hid_boards()
+        except Exception as e:
+            print(f"Could not enumerate boards: {e}")
+            return
+        known = {slot.device_path for slot in self.slots}
+        new_paths = [path for path in paths if path not in known]
+        
+        # A slot started before any board was found claims the first one
+        for slot in self.slots:
+            if slot.device_spec == "hid" and slot.device_path is None and new_paths:
+                slot.device_path = new_paths.pop(0)
+        for path in new_paths:
+            slot = self._add_slot("hid", path)
+            print(f"Found {slot.name}.")
 
     def on_theme_selected(self, theme_name):
         """Called when user selects a new theme from the dropdown."""
@@ -569,27 +846,32 @@ class BalanceBoardApp(QWidget):
             return
             
         self.current_theme_name = theme_name
-        self.config["theme"] = theme_name # Save choice to config
+        self.slot.config["theme"] = theme_name # Save choice to config
         self.apply_theme()
 
     def apply_theme(self):
         """Applies the stylesheet and updates CoMWidget theme."""
-        theme_data = self.themes.get(self.current_theme_name)
+        theme = self._compiled_theme(self.current_theme_name)
         
-        if not theme_data:
+        if not theme:
             print(f"Could not apply theme: {self.current_theme_name} not loaded.")
             return
+        if theme is self.applied_theme:
+            return # Board and profile switches usually keep the theme
 
-        stylesheet = theme_data.get("stylesheet", "")
-        base_theme = theme_data.get("base", "light")
-        
-        self.setStyleSheet(stylesheet)
-        self.com_widget.set_theme(base_theme == "dark")
+        # setStyleSheet re-polishes every widget, so only when the text changed,
+        # and with updates off so the window repaints once at the end
+        if self.applied_theme is None or theme.stylesheet != self.applied_theme.stylesheet:
+            self.setUpdatesEnabled(False)
+            self.setStyleSheet(theme.stylesheet)
+            self.setUpdatesEnabled(True)
+        self.com_widget.set_theme(theme.com)
+        self.applied_theme = theme
 
 
     def update_all_com_labels(self):
         for key in self.QUADRANT_KEYS:
-            text = self.REVERSE_VGAMEPAD_MAP.get(self.button_mappings.get(key))
+            text = self.REVERSE_VGAMEPAD_MAP.get(self.slot.button_mappings.get(key))
             self.com_widget.update_label(key, text, self.button_view_mode)
     
     def on_toggle_view(self):
@@ -603,123 +885,224 @@ class BalanceBoardApp(QWidget):
         self.update_all_com_labels()
 
     def on_threshold_changed(self, key, value):
-        self.thresholds[key] = value
-        self.com_widget.update_threshold_indicators(self.thresholds)
+        self.slot.thresholds[key] = value
+        self.slot.engine.compile_profile()
+        self.com_widget.update_threshold_indicators(self.slot.thresholds)
+
+    def on_press_detection_changed(self, key, value):
+        self.slot.press_detection[key] = value
+        self.slot.engine.compile_profile()
 
     def on_mapping_changed(self, key, text):
         vgamepad_string = self.VGAMEPAD_BUTTON_MAP.get(text)
-        self.button_mappings[key] = vgamepad_string
+        self.slot.button_mappings[key] = vgamepad_string
+        self.slot.engine.compile_profile()
         print(f"Mapping changed: {key} -> {vgamepad_string}")
         
         self.com_widget.update_label(key, text, self.button_view_mode)
 
     def on_combo_mapping_changed(self, key, text):
         vgamepad_string = self.VGAMEPAD_COMBO_MAP.get(text)
-        self.combination_mappings[key] = vgamepad_string
+        self.slot.combination_mappings[key] = vgamepad_string
+        self.slot.engine.compile_profile()
         print(f"Combination Mapping changed: {key} -> {vgamepad_string}")
 
-    def _apply_combo_mapping(self, mapping_str, x, y, dpad_set):
-        """Uses a dispatch dictionary to apply combo actions."""
-        action = self.COMBO_ACTIONS.get(mapping_str)
-        if action:
-            dx, dy, dpad = action
-            if dx: x = dx
-            if dy: y = dy
-            if dpad: dpad_set.add(dpad)
-        return x, y, dpad_set
-
-    def _toggle_gamepad_buttons(self, gamepad_func, button_set, enum_base=vg.XUSB_BUTTON, prefix=""):
-        """Helper to press or release a set of gamepad buttons."""
-        for button_str in button_set:
-            if not button_str: continue
-            # Handle D-Pad prefixing
-            enum_key = f"{prefix}{button_str}" if prefix else button_str
-            button_enum = getattr(enum_base, enum_key, None)
-            if button_enum:
-                gamepad_func(button=button_enum)
+    def refresh_display(self):
+        """Timer slot: shows the newest sample, skipping any stale ones."""
+        data = self.slot.display_cursor.latest()
+        if data is not None:
+            self.update_gui(data)
+            if self._startup_marks is not None:
+                self._startup_mark("first sample")
+                self._startup_report()
+
+    # --- Startup timing ---
+    def _startup_mark(self, name):
+        if self._startup_marks is not None:
+            self._startup_marks.append((name, time.perf_counter()))
+
+    def _startup_report(self):
+        """Prints (and saves to diagnostics/startup.json) when each startup step finished."""
+        if self._startup_marks is None:
+            return
+        marks, self._startup_marks = self._startup_marks, None
+        steps = {name: round((t - STARTUP_T0) * 1000, 1) for name, t in marks}
+        if "first sample" not in steps:
+            print("Startup: no sample yet (board not connected or not tared).")
+        print("Startup (ms since launch): " + " | ".join(f"{name} {ms:.0f}" for name, ms in steps.items()))
+        try:
+            os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+            with open(os.path.join(DIAGNOSTICS_DIR, "startup.json"), "w") as f:
+                json.dump({"recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"), "ms_since_launch": steps}, f, indent=4)
+        except Exception as e:
+            print(f"Could not save startup timing: {e}")
+
+    def _set_label_text(self, label, text):
+        """Only touches the QLabel if the visible text actually changed."""
+        if self._label_text_cache.get(label) != text:
+            self._label_text_cache[label] = text
+            label.setText(text)
 
     def update_gui(self, data):
-        quads = data['quadrants_kg']
+        """View-only refresh; gamepad output is handled by the board's engine."""
+        self._set_label_text(self.total_weight_label, f"{data.total_kg:.2f} kg")
+        self._set_label_text(self.tr_label, f"TR: {data.top_right:.2f} kg")
+        self._set_label_text(self.tl_label, f"TL: {data.top_left:.2f} kg")
+        self._set_label_text(self.br_label, f"BR: {data.bottom_right:.2f} kg")
+        self._set_label_text(self.bl_label, f"BL: {data.bottom_left:.2f} kg")
+        
+        self.com_widget.update_dot(data, self.slot.engine.press_states)
+        
+    def set_status(self, text, slot=None):
+        """Board messages are kept per board and only shown while it's selected."""
+        if slot is not None:
+            slot.status = text
+            if slot is not self.slot:
+                return
+        if not hasattr(self, "status_label"): # Profile errors while the boards start, before the UI
+            print(text)
+            return
+        self.status_label.setText(text)
+
+    def refresh_diagnostics(self):
+        """Timer slot: shows p50/p95/p99 for every pipeline stage."""
+        for stage, stats in self.slot.latency_stats.summary().items():
+            labels = self.latency_labels[stage]
+            for lbl, value in zip(labels, stats or (None, None, None)):
+                self._set_label_text(lbl, f"{value:.0f}" if value is not None else "--")
         
-        self.total_weight_label.setText(f"{data['total_kg']:.2f} kg")
-        self.tr_label.setText(f"TR: {quads['top_right']:.2f} kg")
-        self.tl_label.setText(f"TL: {quads['top_left']:.2f} kg")
-        self.br_label.setText(f"BR: {quads['bottom_right']:.2f} kg")
-        self.bl_label.setText(f"BL: {quads['bottom_left']:.2f} kg")
+        self._set_label_text(
+            self.flush_label,
+            f"Gamepad flushes: {self.slot.engine.flushes} sent, {self.slot.engine.skipped_flushes} skipped"
+        )
         
-        x, y = data['center_of_mass']
+        cursor = self.slot.engine.cursor
+        if cursor:
+            self._set_label_text(
+                self.ring_label,
+                f"Sample ring: {self.slot.sample_ring.write_seq} published, "
+                f"engine {cursor.skipped} skipped / {cursor.overruns} overruns"
+            )
         
-        press_states = {
-            'top_left': quads['top_left'] > self.thresholds.get('top_left', 10.0),
-            'top_right': quads['top_right'] > self.thresholds.get('top_right', 10.0),
-            'bottom_left': quads['bottom_left'] > self.thresholds.get('bottom_left', 10.0),
-            'bottom_right': quads['bottom_right'] > self.thresholds.get('bottom_right', 10.0),
-        }
+        if self.slot.board:
+            kernel = self.slot.board.kernel
+            self._set_label_text(
+                self.filter_label,
+                f"Filter: {kernel.filter_name}, group delay {kernel.group_delay_samples():.1f} reports "
+                f"({kernel.group_delay_sec() * 1000:.0f} ms)"
+            )
         
-        if self.gamepad:
-            ls_x, ls_y = 0, 0
-            dpad_buttons_to_press = set()
-            buttons_to_press_str = set()
-            
-            pressed_quadrants = {q for q, pressed in press_states.items() if pressed}
-            
-            # --- Combination Logic (Refactored) ---
-            combos_activated = set()
-            for quadrants, mapping_key in self.COMBO_DEFINITIONS:
-                if quadrants.issubset(pressed_quadrants - combos_activated):
-                    mapping = self.combination_mappings.get(mapping_key)
-                    if mapping and mapping != "None":
-                        ls_x, ls_y, dpad_buttons_to_press = self._apply_combo_mapping(mapping, ls_x, ls_y, dpad_buttons_to_press)
-                        combos_activated.update(quadrants)
-            
-            # --- Individual Button Logic ---
-            remaining_pressed = pressed_quadrants - combos_activated
-            
-            for quad in remaining_pressed:
-                mapping = self.button_mappings.get(quad)
-                if mapping and mapping != "None":
-                    buttons_to_press_str.add(mapping)
-
-            # --- Apply Gamepad State (Refactored) ---
-            self.gamepad.left_joystick(x_value=ls_x, y_value=ls_y)
-            
-            managed_buttons_str = set(self.button_mappings.values())
-            buttons_to_release_str = managed_buttons_str - buttons_to_press_str
+        self._set_label_text(self.boards_label, "\n".join(
+            f"{slot.name}: {slot.rate_hz:.1f} Hz in, {slot.engine.flushes} gamepad flushes"
+            for slot in self.slots
+        ))
+        
+        for slot in self.slots:
+            if slot.recorder and slot.recorder.error: # Writer thread gave up (disk full, ...)
+                self._stop_recording(slot)
 
-            # Press/Release main buttons
-            self._toggle_gamepad_buttons(self.gamepad.press_button, buttons_to_press_str)
-            self._toggle_gamepad_buttons(self.gamepad.release_button, buttons_to_release_str)
-            
-            # Press/Release D-Pad buttons
-            dpad_buttons_to_release = self.ALL_DPAD_BUTTONS - dpad_buttons_to_press
-            dpad_prefix = "XUSB_GAMEPAD_"
-            self._toggle_gamepad_buttons(self.gamepad.press_button, dpad_buttons_to_press, prefix=dpad_prefix)
-            self._toggle_gamepad_buttons(self.gamepad.release_button, dpad_buttons_to_release, prefix=dpad_prefix)
+    def _file_suffix(self, slot):
+        """'_board2' etc. for files written per board, when there's more than one."""
+        return f"_board{slot.index + 1}" if len(self.slots) > 1 else ""
 
-            self.gamepad.update() 
+    def export_latency_report(self):
+        os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+        filename = time.strftime("latency_%Y%m%d_%H%M%S") + f"{self._file_suffix(self.slot)}.json"
+        full_path = os.path.join(DIAGNOSTICS_DIR, filename)
+        try:
+            self.slot.latency_stats.export(full_path)
+            self.set_status(f"✅ Latency report saved to {full_path}")
+        except Exception as e:
+            self.set_status(f"❌ Error saving latency report: {e}")
 
-        self.com_widget.update_dot(x, y, quads, press_states)
+    def on_record_click(self):
+        """Starts or stops recording the session to sessions/<timestamp>/."""
+        slot = self.slot
+        if slot.recorder:
+            self._stop_recording(slot)
+            return
         
-    def set_status(self, text):
-        self.status_label.setText(text)
+        session_dir = os.path.join(
+            SESSIONS_DIR, time.strftime("session_%Y%m%d_%H%M%S") + self._file_suffix(slot)
+        )
+        try:
+            recorder = SessionRecorder(session_dir, slot.sample_ring, slot.config)
+            recorder.start()
+        except Exception as e:
+            self.set_status(f"❌ Error starting recording: {e}")
+            return
+        slot.recorder = recorder
+        if slot.board:
+            slot.board.attach_recorder(recorder)
+        self.record_button.setText("Stop Recording")
+        self.set_status(f"🔴 Recording to {session_dir}")
 
-    def handle_error(self, text):
-        self.set_status(text)
-        self.tare_button.setEnabled(False)
-        self.rescan_button.setEnabled(True)
+    def _stop_recording(self, slot):
+        """Detaches and closes a board's recorder, then says what was saved (or why it stopped)."""
+        recorder, slot.recorder = slot.recorder, None
+        if slot.board:
+            slot.board.attach_recorder(None)
+        recorder.stop()
+        if slot is self.slot:
+            self.record_button.setText("Start Recording")
+        counts = recorder.header["counts"]
+        saved = f"{recorder.session_dir} ({counts['raw']} reports, {counts['samples']} samples)"
+        if recorder.error:
+            self.set_status(f"❌ Recording stopped: {recorder.error}. Saved so far: {saved}", slot)
+        else:
+            self.set_status(f"✅ Session saved to {saved}", slot)
+
+    def on_rate_measured(self, slot, rate_hz):
+        slot.rate_hz = rate_hz
+        if slot is self.slot:
+            self._show_rate(slot)
+
+    def _show_rate(self, slot):
+        mode = slot.config.get("scheduling_mode", "event")
+        self._set_label_text(self.rate_label, f"Rate: {slot.rate_hz:.1f} Hz ({mode})")
+
+    def on_zero_adjusted(self, slot, drift_kg):
+        self._set_drift_text(slot, f"Zero drift: {drift_kg:+.2f} kg (auto re-tare)")
+
+    def _set_drift_text(self, slot, text):
+        slot.drift_text = text
+        if slot is self.slot:
+            self._set_label_text(self.drift_label, text)
+
+    def _set_ready(self, slot, ready):
+        """Tare button state, kept per board."""
+        slot.ready = ready
+        if slot is self.slot:
+            self.tare_button.setEnabled(ready)
+
+    def handle_error(self, slot, text):
+        self.set_status(text, slot)
+        self._set_ready(slot, False)
+        if slot is self.slot:
+            self.rescan_button.setEnabled(True)
+
+    def on_ready_to_tare(self, slot):
+        self._set_ready(slot, True)
+        if slot is self.slot:
+            self.rescan_button.setEnabled(True)
 
     def on_tare_click(self):
-        self.set_status("🔵 Taring... Please step OFF the board.")
-        self.tare_button.setEnabled(False)
-        if self.board:
-            self.board.perform_tare() 
+        slot = self.slot
+        self.set_status("🔵 Taring... Please step OFF the board.", slot)
+        self._set_ready(slot, False)
+        if slot.board:
+            slot.board.request_tare() # Runs on the board thread
 
-    def on_tare_complete(self, success):
+    def on_tare_progress(self, slot, percent):
+        self.set_status(f"🔵 Taring... {percent}% Please stay OFF the board.", slot)
+
+    def on_tare_complete(self, slot, success):
         if success:
-            self.set_status("Ready! Please step ON the board.")
+            self.set_status("Ready! Please step ON the board.", slot)
+            self._set_drift_text(slot, "Zero drift: +0.00 kg")
         else:
-            self.set_status("Tare failed. No data. Try again.")
-        self.tare_button.setEnabled(True)
+            self.set_status("Tare failed. No data. Try again.", slot)
+        self._set_ready(slot, True)
 
     def save_profile(self):
         """Saves the current settings to the selected profile file."""
@@ -732,14 +1115,15 @@ class BalanceBoardApp(QWidget):
 
         print(f"Saving profile to {full_path}...")
         
-        self.config["button_thresholds_kg"] = self.thresholds
-        self.config["button_mappings"] = self.button_mappings
-        self.config["combination_mappings"] = self.combination_mappings
-        self.config["theme"] = self.current_theme_name # Save the selected theme
+        self.slot.config["button_thresholds_kg"] = self.slot.thresholds
+        self.slot.config["press_detection"] = self.slot.press_detection
+        self.slot.config["button_mappings"] = self.slot.button_mappings
+        self.slot.config["combination_mappings"] = self.slot.combination_mappings
+        self.slot.config["theme"] = self.current_theme_name # Save the selected theme
         
         try:
             with open(full_path, "w") as f:
-                json.dump(self.config, f, indent=4)
+                json.dump(self.slot.config, f, indent=4)
             print("Profile saved.")
             self.set_status(f"✅ Profile saved to {filename_basename}")
         except Exception as e:
@@ -748,22 +1132,41 @@ class BalanceBoardApp(QWidget):
 
     def closeEvent(self, event):
         print("Closing application...")
+        self.refresh_timer.stop()
+        self.diagnostics_timer.stop()
         
-        if self.processing_thread and self.processing_thread.isRunning():
-            self.board.stop_processing()
-            self.processing_thread.quit()
-            self.processing_thread.wait(3000)
+        # Stop every board first so they wind down in parallel
+        running = [slot for slot in self.slots if slot.processing_thread and slot.processing_thread.isRunning()]
+        for slot in running:
+            slot.board.stop_processing()
+        for slot in running:
+            slot.processing_thread.quit()
+            slot.processing_thread.wait(3000)
         
-        if self.gamepad:
-            print("Releasing virtual gamepad...")
-            self.gamepad.reset()
-            self.gamepad.update()
-            del self.gamepad
+        self.output_scheduler.stop()
+        for slot in self.slots:
+            if slot.recorder:
+                slot.recorder.stop()
+                slot.recorder = None
+            
+            if slot.gamepad:
+                print(f"Releasing virtual gamepad for {slot.name}...")
+                slot.gamepad.reset()
+                slot.gamepad.update()
+                slot.gamepad = None
             
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = BalanceBoardApp()
+    parser = argparse.ArgumentParser(description="Wii Balance Board XInput mapper")
+    parser.add_argument("--device", action="append",
+                        help="hid (default, every connected board), replay:<capture>[@speed] or "
+                             "synthetic[@speed]; repeat for several boards")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="Log every raw report to a capture file for later replay")
+    args, qt_args = parser.parse_known_args()
+    
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = BalanceBoardApp(device_specs=args.device or ["hid"], capture_path=args.capture)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
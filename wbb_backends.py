@@ -0,0 +1,299 @@
+import os
+import random
+import struct
+import time
+
+# --- Report Constants (see wbb_board) ---
+CALIBRATION_REPLY = 0x21
+SENSOR_REPORT = 0x32
+READ_CALIBRATION = 0x17
+SET_DATA_MODE = 0x12
+
+# Typical factory calibration: [0 kg], [17 kg], [34 kg] rows, [TR, BR, TL, BL]
+DEFAULT_CALIBRATION = [
+    [4350, 17430, 1520, 2600],
+    [6080, 19200, 3260, 4370],
+    [7820, 20970, 5010, 6140],
+]
+
+def _pack_s16(value):
+    return list(struct.pack('>h', max(-32768, min(32767, int(round(value))))))
+
+def calibration_replies(calibration):
+    """Builds the two 0x21 read-memory replies that carry a calibration block."""
+    block = [0x00] * 4
+    for row in calibration:
+        for value in row:
+            block += _pack_s16(value)
+    block += [0x00] * 4 # Checksum is not verified by the board code
+    return [
+        [CALIBRATION_REPLY, 0x00, 0x00, 0xF0, 0x00, 0x20] + block[0:16],
+        [CALIBRATION_REPLY, 0x00, 0x00, 0xF0, 0x00, 0x30] + block[16:32],
+    ]
+
+def kg_to_raw(kg, corner, calibration):
+    """Inverse of the board's interpolation: kg on one corner -> raw sensor value."""
+    cal_0 = calibration[0][corner]
+    delta_17 = calibration[1][corner] - cal_0
+    delta_34 = calibration[2][corner] - cal_0
+    if kg <= 17.0:
+        return cal_0 + delta_17 * kg / 17.0
+    return cal_0 + delta_17 + (delta_34 - delta_17) * (kg - 17.0) / 17.0
+
+def sensor_report(raw_values):
+    """Builds a 0x32 report from raw [TR, BR, TL, BL] values."""
+    report = [SENSOR_REPORT, 0x00, 0x00]
+    for value in raw_values:
+        report += _pack_s16(value)
+    return report + [0x00] * 11
+
+class _TimedReportDevice:
+    """
+    Base for fake HID devices: answers the board's writes the way a real
+    board would and hands out timed input reports through read().
+
+    speed=1.0 keeps the original timing, 4.0 runs four times faster and
+    0 delivers reports as fast as they are read.
+    """
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self._replies = [] # Responses to writes, delivered before anything else
+        self._reports = None # Iterator of (t_offset_sec, report)
+        self._next = None
+        self._start = None
+        self._nonblocking = False
+
+    # --- hid.device interface ---
+    def set_nonblocking(self, value):
+        self._nonblocking = bool(value)
+
+    def write(self, data):
+        if data[0] == READ_CALIBRATION:
+            self._replies.extend(self._calibration_replies())
+        elif data[0] == SET_DATA_MODE:
+            self._reports = self._report_stream()
+            self._next = next(self._reports, None)
+            self._start = time.monotonic()
+        return len(data)
+
+    def read(self, max_length, timeout_ms=0):
+        if self._replies:
+            return self._replies.pop(0)[:max_length]
+        if self._next is None:
+            if timeout_ms:
+                time.sleep(timeout_ms / 1000.0)
+            return []
+
+        t_offset, report = self._next
+        if self.speed:
+            wait = self._start + t_offset / self.speed - time.monotonic()
+            if wait > 0:
+                if not timeout_ms or wait > timeout_ms / 1000.0:
+                    if timeout_ms:
+                        time.sleep(timeout_ms / 1000.0)
+                    return []
+                time.sleep(wait)
+
+        self._next = next(self._reports, None)
+        return report[:max_length]
+
+    def close(self):
+        self._reports = None
+        self._next = None
+
+    # --- Subclass hooks ---
+    def _calibration_replies(self):
+        raise NotImplementedError
+
+    def _report_stream(self):
+        raise NotImplementedError
+
+class ReplayDevice(_TimedReportDevice):
+    """
+    Replays a capture written by CaptureDevice.
+
+    The 0x21 calibration replies are answered when the board asks for them,
+    and the 0x32 stream starts when the board sets the data mode, keeping
+    the captured spacing between reports (scaled by `speed`).
+    """
+    def __init__(self, path, speed=1.0, loop=False):
+        super().__init__(speed)
+        self.cache_key = f"replay:{os.path.basename(path)}" # See BalanceBoard._device_key
+        self.loop = loop
+        self.calibration_reports = []
+        self.sensor_reports = [] # (t_sec, report)
+        self._load(path)
+
+    def _load(self, path):
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 3 or parts[0] != "R":
+                    continue # Writes and comments are informational only
+                t_sec = float(parts[1])
+                report = list(bytes.fromhex(parts[2]))
+                if report[0] == CALIBRATION_REPLY:
+                    self.calibration_reports.append(report)
+                elif report[0] == SENSOR_REPORT:
+                    self.sensor_reports.append((t_sec, report))
+
+    def _calibration_replies(self):
+        return list(self.calibration_reports)
+
+    def _report_stream(self):
+        if not self.sensor_reports:
+            return
+        t_first = self.sensor_reports[0][0]
+        duration = self.sensor_reports[-1][0] - t_first
+        period = duration / max(1, len(self.sensor_reports) - 1)
+        offset = 0.0
+        while True:
+            for t_sec, report in self.sensor_reports:
+                yield offset + t_sec - t_first, report
+            if not self.loop:
+                return
+            offset += duration + period
+
+class SyntheticDevice(_TimedReportDevice):
+    """
+    Generates a balance board stream from a list of steps.
+
+    Each step is (hold_sec, [TR, BR, TL, BL] kg). The pattern repeats
+    forever at rate_hz, with optional Gaussian sensor noise (in raw units).
+    """
+    def __init__(self, steps=None, rate_hz=100, speed=1.0, noise=0.0,
+                 calibration=DEFAULT_CALIBRATION, seed=0):
+        super().__init__(speed)
+        self.cache_key = "synthetic" # See BalanceBoard._device_key
+        self.steps = steps or step_pattern()
+        self.rate_hz = rate_hz
+        self.noise = noise
+        self.calibration = calibration
+        self._random = random.Random(seed)
+
+    def _calibration_replies(self):
+        return calibration_replies(self.calibration)
+
+    def _report_stream(self):
+        period = 1.0 / self.rate_hz
+        n = 0
+        while True:
+            for hold_sec, kg in self.steps:
+                for _ in range(max(1, int(round(hold_sec * self.rate_hz)))):
+                    raw = [
+                        kg_to_raw(kg[i], i, self.calibration) + self._random.gauss(0, self.noise)
+                        if self.noise else kg_to_raw(kg[i], i, self.calibration)
+                        for i in range(4)
+                    ]
+                    yield n * period, sensor_report(raw)
+                    n += 1
+
+def step_pattern(press_kg=20.0, press_sec=0.3, rest_sec=0.2, settle_sec=5.0):
+    """
+    Default synthetic routine: an unloaded settle period (long enough to
+    tare), then a press on each corner in turn, then a two-corner combo.
+    """
+    rest = (rest_sec, [0.0, 0.0, 0.0, 0.0])
+    steps = [(settle_sec, [0.0, 0.0, 0.0, 0.0])]
+    for corner in range(4):
+        kg = [0.0, 0.0, 0.0, 0.0]
+        kg[corner] = press_kg
+        steps += [(press_sec, kg), rest]
+    steps += [(press_sec, [press_kg, 0.0, press_kg, 0.0]), rest] # Top-left + top-right
+    return steps
+
+class CaptureDevice:
+    """
+    Wraps any device and logs every report read and written to a text
+    capture ("R|W <t_sec> <hex>" per line) that ReplayDevice can play back.
+    """
+    def __init__(self, device, path):
+        self.device = device
+        self._file = open(path, "w")
+        self._file.write("# Wii Balance Board capture: R|W <t_sec> <hex>\n")
+        self._start = time.monotonic()
+
+    def _log(self, direction, data):
+        t_sec = time.monotonic() - self._start
+        self._file.write(f"{direction} {t_sec:.6f} {bytes(data).hex()}\n")
+
+    @property
+    def cache_key(self):
+        return getattr(self.device, "cache_key", None)
+
+    def get_serial_number_string(self):
+        return self.device.get_serial_number_string()
+
+    def set_nonblocking(self, value):
+        return self.device.set_nonblocking(value)
+
+    def write(self, data):
+        self._log("W", data)
+        return self.device.write(data)
+
+    def read(self, max_length, timeout_ms=0):
+        data = self.device.read(max_length, timeout_ms=timeout_ms)
+        if data:
+            self._log("R", data)
+        return data
+
+    def close(self):
+        self.device.close()
+        self._file.close()
+
+class StubGamepad:
+    """
+    Stand-in for vg.VX360Gamepad when ViGEm is not available. Keeps the
+    XUSB state (buttons bitmask + left stick) and counts update() calls.
+    """
+    def __init__(self):
+        self.buttons = 0
+        self.left_x = 0
+        self.left_y = 0
+        self.updates = 0
+        self.report = (0, 0, 0) # State as of the last update()
+
+    def press_button(self, button):
+        self.buttons |= int(button)
+
+    def release_button(self, button):
+        self.buttons &= ~int(button)
+
+    def left_joystick(self, x_value, y_value):
+        self.left_x, self.left_y = x_value, y_value
+
+    def reset(self):
+        self.buttons = 0
+        self.left_x = self.left_y = 0
+
+    def update(self):
+        self.updates += 1
+        self.report = (self.buttons, self.left_x, self.left_y)
+
+def device_factory(spec):
+    """
+    Returns a callable that opens the device described by `spec`, or None
+    for the physical board:
+        "hid"                      physical board (default)
+        "replay:<path>[@speed]"    capture file, e.g. replay:session.cap@4
+        "synthetic[@speed]"        generated step pattern
+    """
+    if not spec or spec == "hid":
+        return None
+
+    kind, _, arg = spec.partition(":")
+    if kind == "replay":
+        path, speed = arg, 1.0
+        head, _, tail = arg.rpartition("@")
+        if head: # "@" may also be part of the path (C:\Users\me@corp\...)
+            try:
+                path, speed = head, float(tail)
+            except ValueError:
+                pass
+        return lambda: ReplayDevice(path, speed=speed)
+
+    kind, _, speed = spec.partition("@")
+    if kind == "synthetic":
+        return lambda: SyntheticDevice(speed=float(speed or 1))
+
+    raise ValueError(f"Unknown device spec: {spec}")
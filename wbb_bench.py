@@ -0,0 +1,249 @@
+"""
+Benchmark for the sensor-to-gamepad hot path.
+
+Feeds recorded (--capture) or synthetic 0x32 reports through the same
+code the board thread and input engine run, against a StubGamepad:
+
+    python wbb_bench.py                              # synthetic reports
+    python wbb_bench.py --capture session.cap        # recorded reports
+    python wbb_bench.py --save-baseline bench_baseline.json
+    python wbb_bench.py --compare bench_baseline.json
+
+It also checks that a clean step onto a corner gives exactly one press
+with fast_press on (no chatter while the average catches up), and that
+a corner still releases when hysteresis_kg is larger than its threshold.
+It exits with status 1 if either check fails.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+from wbb_board import BalanceBoard
+from wbb_input_engine import GamepadEngine, DEFAULT_PRESS_DETECTION, QUADRANT_KEYS
+from wbb_backends import SyntheticDevice, StubGamepad, SENSOR_REPORT, CALIBRATION_REPLY
+from wbb_samples import Sample
+
+STAGES = ("parse", "calibrate", "smooth", "processed", "resolve", "end_to_end")
+
+def load_reports(capture_path, count):
+    """Returns (calibration replies, sensor reports) from a capture or the synthetic pattern."""
+    if not capture_path:
+        device = SyntheticDevice(noise=3.0)
+        stream = device._report_stream()
+        return device._calibration_replies(), [next(stream)[1] for _ in range(count)]
+
+    calibration, reports = [], []
+    with open(capture_path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 3 or parts[0] != "R":
+                continue
+            report = list(bytes.fromhex(parts[2]))
+            if report[0] == CALIBRATION_REPLY:
+                calibration.append(report)
+            elif report[0] == SENSOR_REPORT:
+                reports.append(report)
+    if not reports:
+        raise SystemExit(f"No 0x32 reports in {capture_path}")
+    # Repeat the capture until we have enough samples
+    return calibration, (reports * (count // len(reports) + 1))[:count]
+
+def make_pipeline(profile, calibration_replies):
+    """Builds a board (never connected) and a synchronous engine with a stub gamepad."""
+    board = BalanceBoard(profile)
+    data = {}
+    for reply in calibration_replies:
+        address = (reply[4] << 8) | reply[5]
+        data[address] = reply[6:22]
+    board._parse_calibration(data[0x0020] + data[0x0030])
+    board.zero_point = list(board.calibration[0]) # As if tared on an empty board
+    board.kernel.configure(board.calibration, board.zero_point)
+
+    engine = GamepadEngine(StubGamepad())
+    engine.set_profile(
+        profile.get("button_thresholds_kg", {}),
+        profile.get("button_mappings", {}),
+        profile.get("combination_mappings", {})
+    )
+    return board, engine
+
+def _time_stage(func, inputs, repeat):
+    """Best-of-`repeat` seconds to run func over every input."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _blocks_per_call(func, inputs):
+    """Heap blocks still alive per call when every result is kept (output allocations)."""
+    gc.collect()
+    before = sys.getallocatedblocks()
+    results = [func(item) for item in inputs]
+    after = sys.getallocatedblocks()
+    # The results list itself is one block
+    blocks = (after - before - 1) / len(inputs)
+    del results
+    return blocks
+
+def run(profile, calibration_replies, reports, repeat):
+    board, engine = make_pipeline(profile, calibration_replies)
+    kernel = board.kernel
+
+    raw_values = [board._parse_sensor_data(r) for r in reports]
+    weights = [board._calculate_weights(raw) for raw in raw_values]
+    averaged = [kernel.smooth(w) for w in weights]
+    kernel.reset()
+    samples = [board._get_processed_data(a) for a in averaged]
+
+    def end_to_end(report):
+        engine.process(board._get_processed_data(kernel.smooth(
+            board._calculate_weights(board._parse_sensor_data(report)))))
+
+    stages = {
+        "parse": (board._parse_sensor_data, reports),
+        "calibrate": (board._calculate_weights, raw_values),
+        "smooth": (kernel.smooth, weights),
+        "processed": (board._get_processed_data, averaged),
+        "resolve": (engine.process, samples),
+        "end_to_end": (end_to_end, reports),
+    }
+
+    results = {}
+    for stage in STAGES:
+        func, inputs = stages[stage]
+        seconds = _time_stage(func, inputs, repeat)
+        results[stage] = {
+            "ns_per_sample": seconds / len(inputs) * 1e9,
+            "samples_per_sec": len(inputs) / seconds,
+            "blocks_per_sample": _blocks_per_call(func, inputs[:2000]),
+        }
+    return results
+
+def check_step_presses(profile, calibration_replies, averaging_samples=10):
+    """
+    Runs one pass of the noise-free synthetic step pattern through the
+    board and a fast_press engine behind a slow moving average. Returns
+    {corner: (presses, expected)} for every corner that didn't get
+    exactly one press per step onto it.
+    """
+    profile = dict(profile, averaging_samples=averaging_samples, filter="moving_average")
+    board, engine = make_pipeline(profile, calibration_replies)
+    engine.set_profile(
+        engine.thresholds, engine.button_mappings, engine.combination_mappings,
+        dict(DEFAULT_PRESS_DETECTION, fast_press=True)
+    )
+    device = SyntheticDevice()
+    
+    # Expected presses from the steps themselves; kg is [TR, BR, TL, BL]
+    thresholds = engine._threshold_values
+    expected = [0, 0, 0, 0]
+    was_loaded = [False] * 4
+    count = 0
+    for hold_sec, kg in device.steps:
+        loaded = [kg[2] > thresholds[0], kg[3] > thresholds[1], kg[0] > thresholds[2], kg[1] > thresholds[3]]
+        for bit in range(4):
+            expected[bit] += loaded[bit] and not was_loaded[bit]
+        was_loaded = loaded
+        count += max(1, int(round(hold_sec * device.rate_hz)))
+    
+    presses = [0, 0, 0, 0]
+    last_mask = 0
+    stream = device._report_stream()
+    for _ in range(count):
+        report = next(stream)[1]
+        engine.process(board._process_newest([board._parse_sensor_data(report)]))
+        for bit in range(4):
+            presses[bit] += bool(engine._mask & ~last_mask & (1 << bit))
+        last_mask = engine._mask
+    
+    return {
+        QUADRANT_KEYS[bit]: (presses[bit], expected[bit])
+        for bit in range(4) if presses[bit] != expected[bit]
+    }
+
+def check_hysteresis_release(threshold_kg=5.0, hysteresis_kg=6.0):
+    """
+    Presses top_left past a threshold smaller than the hysteresis, then
+    steps off. Returns the gamepad report left behind if the button is
+    still held, else None.
+    """
+    engine = GamepadEngine(StubGamepad())
+    engine.set_profile(
+        {key: threshold_kg for key in QUADRANT_KEYS}, {"top_left": "XUSB_GAMEPAD_A"}, {},
+        dict(DEFAULT_PRESS_DETECTION, hysteresis_kg=hysteresis_kg)
+    )
+    sample = Sample()
+    for kg in (20.0, 0.0):
+        sample.top_left = sample.total_kg = kg
+        engine.process(sample)
+    report = engine.gamepad.report
+    return report if report[0] else None
+
+def print_results(results, baseline=None):
+    print(f"{'stage':<12}{'ns/sample':>12}{'samples/s':>14}{'blocks/sample':>15}{'vs baseline':>14}")
+    for stage in STAGES:
+        r = results[stage]
+        change = ""
+        if baseline and stage in baseline:
+            old = baseline[stage]["ns_per_sample"]
+            change = f"{(r['ns_per_sample'] - old) / old * 100:+.1f}%"
+        print(f"{stage:<12}{r['ns_per_sample']:>12.0f}{r['samples_per_sec']:>14.0f}"
+              f"{r['blocks_per_sample']:>15.1f}{change:>14}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sensor-to-gamepad hot path.")
+    parser.add_argument("--capture", help="Capture file to replay (default: synthetic reports)")
+    parser.add_argument("--profile", default="profiles/PDAFT.json", help="Profile JSON for thresholds/mappings")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write results as a baseline JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline")
+    args = parser.parse_args()
+
+    with open(args.profile, "r") as f:
+        profile = json.load(f)
+    calibration_replies, reports = load_reports(args.capture, args.samples)
+    results = run(profile, calibration_replies, reports, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["stages"]
+
+    print(f"{len(reports)} reports, {'capture ' + args.capture if args.capture else 'synthetic'}, "
+          f"profile {args.profile}, best of {args.repeat}")
+    print_results(results, baseline)
+    
+    failures = check_step_presses(profile, calibration_replies)
+    for corner, (presses, expected) in failures.items():
+        print(f"Press check FAILED: {corner} pressed {presses} times for {expected} steps")
+    if not failures:
+        print("Press check: one press per step with fast_press")
+    
+    stuck_report = check_hysteresis_release()
+    if stuck_report:
+        print(f"Release check FAILED: button still held after stepping off, report {stuck_report}")
+    else:
+        print("Release check: hysteresis above the threshold still releases")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "machine": platform.platform(),
+                "samples": len(reports),
+                "stages": results,
+            }, f, indent=4)
+        print(f"Baseline saved to {args.save_baseline}")
+    if failures or stuck_report:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
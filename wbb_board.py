@@ -0,0 +1,871 @@
+import threading
+import time
+import struct
+from wbb_kernel import SensorKernel
+from wbb_samples import SampleRing
+
+# --- Constants ---
+NINTENDO_VID = 0x057e
+WIIMOTE_PID = 0x0306
+READ_CALIBRATION_CMD = [0x17, 0x04, 0xA4, 0x00, 0x20, 0x00, 0x20]
+SET_DATA_MODE_REPORT = [0x12, 0x00, 0x32]
+SET_LED_REPORT = [0x11, 0x00]
+CALIBRATION_VERIFY_SEC = 5.0 # Background re-read of cached calibration gives up after this
+RECONNECT_INTERVAL_SEC = 0.25
+MAX_DRAIN_REPORTS = 256 # Upper bound on reports handled per wakeup
+
+def _unpack_s16(byte1, byte2):
+    return struct.unpack('>h', bytes([byte1, byte2]))[0]
+
+class Signal:
+    """
+    Minimal stand-in for pyqtSignal: connect(), disconnect() and emit().
+    Callbacks run on the emitting thread (the board thread), so keep them
+    short or hand off; WiiBalanceBoard_qt re-emits them as Qt signals.
+    """
+    def __init__(self):
+        self._callbacks = [] # Replaced, never mutated, so emit() needs no lock
+
+    def connect(self, callback):
+        self._callbacks = self._callbacks + [callback]
+
+    def disconnect(self, callback):
+        self._callbacks = [c for c in self._callbacks if c != callback]
+
+    def emit(self, *args):
+        for callback in self._callbacks:
+            callback(*args)
+
+class _AsyncWakeup:
+    """Ring wakeup (see SampleRing.cursor) that sets an asyncio.Event from the board thread."""
+    def __init__(self, loop, event):
+        self.loop = loop
+        self.event = event
+        self._pending = False # At most one call_soon_threadsafe in flight
+
+    def set(self):
+        if self._pending:
+            return
+        self._pending = True
+        try:
+            self.loop.call_soon_threadsafe(self._set)
+        except RuntimeError: # Loop closed; the stream is gone
+            pass
+
+    def _set(self):
+        self._pending = False
+        self.event.set()
+
+def list_hid_boards():
+    """HID paths of every connected board (and Wiimote; they share the PID)."""
+    import hid # Imported on first use; replay/synthetic runs never need it
+    return [info["path"] for info in hid.enumerate(NINTENDO_VID, WIIMOTE_PID)]
+
+def discover_boards(device_specs):
+    """
+    (device_spec, hid_path) per board to run. "hid" expands to every
+    connected board, or to one board opened on first connect (path None)
+    while none is connected; other specs (see wbb_backends) pass through.
+    """
+    boards = []
+    for spec in device_specs:
+        if spec != "hid":
+            boards.append((spec, None))
+            continue
+        try:
+            paths = list_hid_boards()
+        except Exception as e:
+            print(f"Could not enumerate boards: {e}")
+            paths = []
+        taken = {path for _, path in boards}
+        new_paths = [path for path in paths if path not in taken]
+        if not new_paths and not any(kind == "hid" for kind, _ in boards):
+            new_paths = [None]
+        boards.extend(("hid", path) for path in new_paths)
+    return boards
+
+def open_hid_device(path=None):
+    """Opens the board at `path`, or the first one found (default device factory)."""
+    import hid
+    device = hid.device()
+    if path:
+        device.open_path(path)
+    else:
+        device.open(NINTENDO_VID, WIIMOTE_PID)
+    return device
+
+# Names of the Signal attributes, for adapters that re-emit them (WiiBalanceBoard_qt)
+SIGNALS = (
+    "status_update", "ready_to_tare", "tare_progress", "tare_complete",
+    "error_occurred", "rate_measured", "zero_adjusted", "finished",
+)
+
+class BalanceBoard:
+    """
+    API for the Wii Balance Board, without any GUI framework.
+
+    start() runs the processing loop on its own thread (or call
+    start_processing_loop() from a thread you own). Status is reported
+    through Signal callbacks; samples go to self.sample_ring and can be
+    read with a cursor, samples() from another thread, or
+    `async for sample in board.stream()` from asyncio.
+    """
+    def __init__(self, config, sample_ring=None, latency_stats=None, device_factory=None,
+                 calibration_cache=None, device_path=None):
+        # --- Signals (callbacks run on the board thread) ---
+        self.status_update = Signal() # (str)
+        self.ready_to_tare = Signal() # ()
+        self.tare_progress = Signal() # (int) Percent of TARE_DURATION elapsed
+        self.tare_complete = Signal() # (bool)
+        self.error_occurred = Signal() # (str)
+        self.rate_measured = Signal() # (float) Achieved samples/sec, about once a second
+        self.zero_adjusted = Signal() # (float) Drift (kg) absorbed since the last manual tare
+        self.finished = Signal() # () The processing loop has returned
+        self._thread = None
+        
+        self.device = None
+        # Callable returning an opened hid.device-like object (see wbb_backends)
+        self.device_factory = device_factory or open_hid_device
+        self.device_path = device_path # HID path the board was opened with, if known
+        # Every processed sample is published here; engine, GUI, etc. hold cursors
+        self.sample_ring = sample_ring or SampleRing()
+        self.latency = latency_stats # Optional wbb_latency.LatencyStats
+        self.recorder = None # Optional wbb_session.SessionRecorder, see attach_recorder
+        self.calibration_cache = calibration_cache # Optional wbb_cache.CalibrationCache
+        self.device_key = None
+        self.calibration = []
+        self.zero_point = []
+        self.running = True
+        self.is_tared = False
+        
+        # --- Tare command state (owned by the worker thread) ---
+        self._tare_requested = False
+        self._tare_active = False
+        self._tare_start = 0.0
+        self._tare_sums = [0, 0, 0, 0]
+        self._tare_count = 0
+        self._tare_percent = 0
+        
+        # --- Background check of cached calibration (see _request_verify) ---
+        self._verify_packets = None # {address: 16 bytes} while verifying
+        self._verify_deadline = 0.0
+        
+        # Load settings from config
+        self.READ_TIMEOUT_MS = 20
+        self.TARE_DURATION = config.get("tare_duration_sec", 3.0)
+        self.use_cached_tare = config.get("use_cached_tare", True)
+        self.auto_reconnect = config.get("auto_reconnect", True)
+        self.averaging_samples = config.get("averaging_samples", 5)
+        self.dead_zone_kg = config.get("dead_zone_kg", 0.2)
+        # "moving_average" (averaging_samples), "ema", "one_euro" or "median"; see wbb_filters
+        self.filter_name = config.get("filter", "moving_average")
+        self.filter_params = config.get("filter_params", {})
+        
+        # --- Scheduling ---
+        # "event": one sample per report, "fixed": polling_rate_hz,
+        # "low_power": like "event", but wakes at idle_rate_hz while unloaded
+        self.scheduling_mode = config.get("scheduling_mode", "event")
+        self.polling_interval = 1.0 / max(1, config.get("polling_rate_hz", 100))
+        self.fixed_rate_reduce = config.get("fixed_rate_reduce", "average") # or "latest"
+        self.idle_interval = 1.0 / max(1, config.get("idle_rate_hz", 10))
+        self.idle_after_sec = config.get("idle_after_sec", 2.0)
+        self.achieved_rate_hz = 0.0
+        
+        self._next_due = 0.0
+        self._reduce_sums = [0.0, 0.0, 0.0, 0.0]
+        self._reduce_count = 0
+        self._unloaded_since = None
+        self._rate_count = 0
+        self._rate_start = 0.0
+        self._batch_time = 0.0 # perf_counter() when the newest batch arrived
+        
+        # --- Drift compensation: zero tracking while unloaded ---
+        self.drift_compensation = config.get("drift_compensation", True)
+        self.drift_window_sec = config.get("drift_window_sec", 5.0) # Unloaded this long first
+        self.drift_time_constant_sec = max(1.0, config.get("drift_time_constant_sec", 30.0))
+        self._tare_zero = [] # zero_point from the last manual tare
+        self._drift_batch = [] # Newest batch from _read_batch, consumed by _track_zero
+        self._last_total_kg = None
+        self._unloaded_for_drift = None # monotonic() when the board was last seen unloaded
+        self._drift_applied_at = 0.0
+        self._drift_reported_kg = 0.0
+        
+        # --- Calibration + smoothing kernel ---
+        self.kernel = SensorKernel(
+            self.averaging_samples, self.dead_zone_kg, self.filter_name, self.filter_params
+        )
+
+    def _connect(self, quiet=False):
+        """Attempts to connect to the Balance Board."""
+        try:
+            self.device = self.device_factory()
+            self.device.set_nonblocking(1)
+            return True
+        except Exception as e: # hidapi raises IOError/OSError; fakes may raise anything
+            self.device = None
+            if not quiet:
+                self.error_occurred.emit(f"Connection failed: {e}")
+            return False
+
+    def _device_key(self):
+        """
+        Cache key for the connected board: serial number, else the backend's
+        key, else its HID path. VID:PID only when none is known, since every
+        board would share that entry.
+        """
+        try:
+            serial = self.device.get_serial_number_string()
+        except Exception:
+            serial = None
+        key = serial or getattr(self.device, "cache_key", None)
+        if key:
+            return key
+        path = self.device_path
+        if path:
+            return "path:" + (path.decode(errors="replace") if isinstance(path, bytes) else str(path))
+        return f"{NINTENDO_VID:04x}:{WIIMOTE_PID:04x}"
+
+    def _set_led(self, status=True, quiet=False):
+        """Sets the board's blue 'Player 1' LED on or off."""
+        if not self.device: return False
+        try:
+            payload = 0x10 if status else 0x00
+            self.device.write([0x11, payload])
+            return True
+        except Exception as e:
+            if not quiet:
+                self.status_update.emit(f"Warning: Could not set LED. {e}")
+            return False
+
+    def _read_calibration(self, quiet=False):
+        """Reads and parses the 32-byte factory calibration data."""
+        if not self.device: return False
+        report_error = (lambda text: None) if quiet else self.error_occurred.emit
+        try:
+            self.device.write(READ_CALIBRATION_CMD)
+            data_packets = {}
+            start_time = time.time()
+            
+            while len(data_packets) < 2 and (time.time() - start_time) < 5.0:
+                data = self.device.read(64, timeout_ms=self.READ_TIMEOUT_MS) 
+                if not data or data[0] != 0x21:
+                    continue
+                
+                error_code = data[3] & 0x0F
+                if error_code != 0: 
+                    report_error("Error reading calibration packet.")
+                    return False
+                
+                address = (data[4] << 8) | data[5]
+                if address == 0x0020:
+                    data_packets[0] = data[6:22]
+                elif address == 0x0030:
+                    data_packets[1] = data[6:22]
+            
+            if len(data_packets) != 2: 
+                report_error("Calibration read timed out.")
+                return False
+
+            full_data = data_packets[0] + data_packets[1]
+            self._parse_calibration(full_data)
+            if self.recorder:
+                self.recorder.set_calibration(self.calibration)
+            if self.calibration_cache:
+                self.calibration_cache.store(self.device_key, calibration=self.calibration)
+            return True
+
+        except Exception as e:
+            report_error(f"Calibration read failed: {e}")
+            return False
+
+    def _parse_calibration(self, data):
+        """Parses the 32-byte data into 3 calibration sets."""
+        cal_0kg = [
+            _unpack_s16(data[4], data[5]), _unpack_s16(data[6], data[7]),
+            _unpack_s16(data[8], data[9]), _unpack_s16(data[10], data[11])
+        ]
+        cal_17kg = [
+            _unpack_s16(data[12], data[13]), _unpack_s16(data[14], data[15]),
+            _unpack_s16(data[16], data[17]), _unpack_s16(data[18], data[19])
+        ]
+        cal_34kg = [
+            _unpack_s16(data[20], data[21]), _unpack_s16(data[22], data[23]),
+            _unpack_s16(data[24], data[25]), _unpack_s16(data[26], data[27])
+        ]
+        self.calibration = [cal_0kg, cal_17kg, cal_34kg]
+
+    def _request_verify(self):
+        """
+        Asks the board for its calibration again while it streams. The
+        0x21 replies are picked out of the report stream by _read_batch.
+        """
+        try:
+            self.device.write(READ_CALIBRATION_CMD)
+        except Exception as e:
+            self.status_update.emit(f"Warning: Could not verify calibration. {e}")
+            return
+        self._verify_packets = {}
+        self._verify_deadline = time.monotonic() + CALIBRATION_VERIFY_SEC
+
+    def _add_verify_packet(self, data):
+        """Worker thread: one 0x21 reply to _request_verify."""
+        if data[3] & 0x0F:
+            return
+        address = (data[4] << 8) | data[5]
+        if address in (0x0020, 0x0030):
+            self._verify_packets[address] = data[6:22]
+        if len(self._verify_packets) < 2:
+            return
+        
+        cached = self.calibration
+        self._parse_calibration(self._verify_packets[0x0020] + self._verify_packets[0x0030])
+        self._verify_packets = None
+        if self.calibration == cached:
+            return
+        
+        # Different board behind the same key, or a bad cache: start over
+        print(f"Cached calibration for {self.device_key} was stale; using the board's.")
+        if self.calibration_cache:
+            self.calibration_cache.store(self.device_key, calibration=self.calibration)
+            self.calibration_cache.forget(self.device_key, "zero_point")
+        if self.recorder:
+            self.recorder.set_calibration(self.calibration)
+        self.is_tared = False
+        self.kernel.configure(None, None)
+        self.status_update.emit("Calibration changed. Click 'Tare (Zero)' again.")
+        self.tare_complete.emit(False)
+
+    def _check_verify(self, now):
+        if self._verify_packets is not None and now > self._verify_deadline:
+            self._verify_packets = None
+            print("Calibration check timed out; keeping the cached calibration.")
+
+    def _set_data_mode(self, quiet=False):
+        """Tells the board to start streaming sensor data."""
+        if not self.device: return False
+        try:
+            self.device.write(SET_DATA_MODE_REPORT)
+            return True
+        except Exception as e:
+            if not quiet:
+                self.error_occurred.emit(f"Failed to set data mode: {e}")
+            return False
+
+    def _parse_sensor_data(self, data):
+        """Parses a 0x32 report and returns 4 raw sensor values."""
+        if data[0] != 0x32:
+            return None
+        
+        top_right = _unpack_s16(data[3], data[4])
+        bottom_right = _unpack_s16(data[5], data[6])
+        top_left = _unpack_s16(data[7], data[8])
+        bottom_left = _unpack_s16(data[9], data[10])
+        
+        return [top_right, bottom_right, top_left, bottom_left]
+
+    def request_tare(self):
+        """
+        Public, thread-safe request to perform the "zeroing" (tare) operation.
+        Returns immediately; the worker thread runs the tare between reads
+        and emits tare_progress(int) and tare_complete(bool).
+        """
+        if not self.device:
+            self.tare_complete.emit(False)
+            return
+        self._tare_requested = True
+
+    def attach_recorder(self, recorder):
+        """
+        Starts (or with None, stops) feeding raw reports to a session recorder.
+        Safe to call from any thread; the current calibration and tare are
+        written to the recorder's header first.
+        """
+        if recorder:
+            if self.calibration:
+                recorder.set_calibration(self.calibration)
+            if self.is_tared:
+                recorder.add_tare(self.zero_point)
+        self.recorder = recorder
+
+    def _flush_input(self):
+        """
+        Discards reports queued before the tare window opened. Bounded like
+        _read_batch: a device that always has a report ready (speed 0
+        backends) would otherwise keep this loop going forever.
+        """
+        for _ in range(MAX_DRAIN_REPORTS):
+            if not self.device.read(64):
+                break
+
+    def _begin_tare(self):
+        """Worker thread: opens a new tare window."""
+        self._tare_requested = False
+        self._flush_input()
+        self._tare_sums = [0, 0, 0, 0]
+        self._tare_count = 0
+        self._tare_percent = 0
+        self._tare_start = time.monotonic()
+        self._tare_active = True
+        self.tare_progress.emit(0)
+
+    def _add_tare_sample(self, sensor_data):
+        """Worker thread: accumulates one report into the tare window."""
+        sums = self._tare_sums
+        for i in range(4):
+            sums[i] += sensor_data[i]
+        self._tare_count += 1
+
+    def _update_tare(self):
+        """Worker thread: reports progress and closes the window when it expires."""
+        elapsed = time.monotonic() - self._tare_start
+        if elapsed < self.TARE_DURATION:
+            percent = int(100 * elapsed / self.TARE_DURATION)
+            if percent != self._tare_percent:
+                self._tare_percent = percent
+                self.tare_progress.emit(percent)
+            return
+
+        self._tare_active = False
+        if not self._tare_count:
+            self.tare_complete.emit(False)
+            return
+
+        # Average every report seen during the window for each sensor
+        self._apply_tare([total / self._tare_count for total in self._tare_sums])
+        if self.calibration_cache:
+            self.calibration_cache.store(self.device_key, zero_point=self.zero_point)
+        self.tare_progress.emit(100)
+        self.tare_complete.emit(True)
+
+    def _apply_tare(self, zero_point):
+        """Worker thread: makes zero_point current (manual tare or cache)."""
+        self.zero_point = list(zero_point)
+        
+        # Precompute calibration terms and clear smoothing buffers
+        self.kernel.configure(self.calibration, self.zero_point)
+        self.kernel.reset()
+        self._tare_zero = list(self.zero_point)
+        self._unloaded_for_drift = None
+        self._drift_reported_kg = 0.0
+
+        self.is_tared = True
+        if self.recorder:
+            self.recorder.add_tare(self.zero_point)
+
+    def _calculate_weights(self, raw_values):
+        """Interpolates raw sensor values to kg using calibration data."""
+        # [TR, BR, TL, BL]
+        return self.kernel.calculate_weights(raw_values)
+
+    def _get_processed_data(self, weights):
+        """
+        Calculates Total Weight and CoM from the provided weights.
+        """
+        return self.kernel.processed(weights)
+        
+    def _emit_sample(self, processed_data):
+        """
+        Publishes a sample filled into sample_ring.claim(). Never blocks:
+        a consumer that falls behind sees an overrun on its cursor.
+        """
+        # Latency timestamps travel with the sample to the engine
+        processed_data.t_read = self._batch_time
+        processed_data.t_ready = time.perf_counter()
+        self.sample_ring.publish()
+        self._last_total_kg = processed_data.total_kg
+        self._rate_count += 1
+
+    def _tick_rate_meter(self, now):
+        """Publishes the achieved output rate roughly once a second."""
+        elapsed = now - self._rate_start
+        if elapsed >= 1.0:
+            self.achieved_rate_hz = self._rate_count / elapsed
+            self.rate_measured.emit(self.achieved_rate_hz)
+            self._rate_count = 0
+            self._rate_start = now
+
+    def _drift_kg(self):
+        """Total kg the zero point has moved since the last manual tare."""
+        drift = 0.0
+        for i in range(4):
+            delta_17 = self.calibration[1][i] - self.calibration[0][i]
+            if delta_17:
+                drift += (self.zero_point[i] - self._tare_zero[i]) * 17.0 / delta_17
+        return drift
+
+    def _track_zero(self, now):
+        """
+        Once the board has read as empty (total under the dead zone) for
+        drift_window_sec, every report nudges zero_point towards it with
+        an exponential average (time constant drift_time_constant_sec).
+        The kernel picks up the new zero about once a second, and
+        zero_adjusted is emitted when the drift has moved by 10 g or more.
+        """
+        batch = self._drift_batch
+        self._drift_batch = []
+        if self._last_total_kg != 0.0: # Loaded, or no sample yet
+            self._unloaded_for_drift = None
+            return
+        if self._unloaded_for_drift is None:
+            self._unloaded_for_drift = now
+            return
+        if not batch or now - self._unloaded_for_drift < self.drift_window_sec:
+            return
+        
+        zero = self.zero_point
+        alpha = 1.0 / (self.drift_time_constant_sec * self.kernel.report_rate_hz)
+        for sensor_data in batch:
+            for i in range(4):
+                zero[i] += alpha * (sensor_data[i] - zero[i])
+        
+        if now - self._drift_applied_at < 1.0:
+            return
+        self._drift_applied_at = now
+        self.kernel.configure(self.calibration, zero)
+        drift_kg = self._drift_kg()
+        if abs(drift_kg - self._drift_reported_kg) >= 0.01:
+            self._drift_reported_kg = drift_kg
+            if self.recorder:
+                self.recorder.add_zero_update(zero)
+            self.zero_adjusted.emit(drift_kg)
+
+    def _read_batch(self, timeout_ms):
+        """
+        Waits up to timeout_ms for a report, then drains every report already
+        queued by the OS. Returns the raw sensor values of each 0x32 report,
+        oldest first.
+        """
+        data = self.device.read(64, timeout_ms=timeout_ms)
+        if not data:
+            return []
+        
+        t_first = time.perf_counter()
+        reports = []
+        while data:
+            reports.append(data)
+            if len(reports) >= MAX_DRAIN_REPORTS:
+                break
+            data = self.device.read(64) # Non-blocking: only what's queued
+        t_read = time.perf_counter()
+        
+        batch = []
+        for data in reports:
+            sensor_data = self._parse_sensor_data(data)
+            if sensor_data:
+                batch.append(sensor_data)
+            elif data[0] == 0x21 and self._verify_packets is not None:
+                self._add_verify_packet(data)
+        
+        self._batch_time = t_first
+        self._drift_batch = batch
+        if self.recorder:
+            self.recorder.add_raw(t_first, batch)
+        if self.latency:
+            self.latency.record("read", t_read - t_first)
+            self.latency.record("parse", time.perf_counter() - t_read)
+        return batch
+
+    def _process_newest(self, batch):
+        """
+        Calibrates and smooths a batch, returning the processed sample for
+        the newest report. Older reports only feed the smoothing window.
+        """
+        kernel = self.kernel
+        older = batch[-kernel.history:-1] if kernel.history else batch[:-1]
+        for sensor_data in older:
+            kernel.smooth(kernel.calculate_weights(sensor_data))
+        
+        t0 = time.perf_counter()
+        weights = kernel.calculate_weights(batch[-1])
+        t1 = time.perf_counter()
+        processed_data = kernel.processed(kernel.smooth(weights), self.sample_ring.claim())
+        processed_data.unsmoothed = weights # For fast_press in the input engine
+        
+        if self.latency:
+            self.latency.record("calibrate", t1 - t0)
+            self.latency.record("smooth", time.perf_counter() - t1)
+        return processed_data
+
+    def _step_event(self):
+        """'event' mode: one output sample per wakeup, from the newest report."""
+        batch = self._read_batch(self.READ_TIMEOUT_MS)
+        if batch:
+            # --- Calibrate, smooth, CoM; older reports only feed smoothing ---
+            processed_data = self._process_newest(batch)
+            self._emit_sample(processed_data)
+            return processed_data
+        return None
+
+    def _step_fixed(self, now):
+        """'fixed' mode: reduces reports to one output sample per polling interval."""
+        if not self._next_due:
+            self._next_due = now + self.polling_interval
+
+        wait_ms = max(1, int((self._next_due - now) * 1000))
+        batch = self._read_batch(min(wait_ms, self.READ_TIMEOUT_MS))
+        if batch and self.fixed_rate_reduce == "latest":
+            self._reduce_sums = self.kernel.calculate_weights(batch[-1])
+            self._reduce_count = 1
+        elif batch:
+            sums = self._reduce_sums
+            for sensor_data in batch:
+                weights = self.kernel.calculate_weights(sensor_data)
+                for i in range(4):
+                    sums[i] += weights[i]
+            self._reduce_count += len(batch)
+
+        now = time.monotonic()
+        if now < self._next_due:
+            return
+        
+        self._next_due += self.polling_interval
+        if self._next_due < now: # Fell behind; don't burst to catch up
+            self._next_due = now + self.polling_interval
+        
+        if self._reduce_count:
+            count = self._reduce_count
+            reduced = [total / count for total in self._reduce_sums]
+            self._reduce_sums = [0.0, 0.0, 0.0, 0.0]
+            self._reduce_count = 0
+            processed_data = self.kernel.processed(self.kernel.smooth(reduced), self.sample_ring.claim())
+            processed_data.unsmoothed = reduced
+            self._emit_sample(processed_data)
+
+    def _step_low_power(self, now):
+        """'low_power' mode: event-driven while loaded, slow wakeups while unloaded."""
+        if self._unloaded_since is not None and now - self._unloaded_since >= self.idle_after_sec:
+            time.sleep(self.idle_interval)
+            # Catch up on everything queued while asleep; only the newest is emitted
+            batch = self._read_batch(0)
+            processed_data = self._process_newest(batch) if batch else None
+            if processed_data:
+                self._emit_sample(processed_data)
+        else:
+            processed_data = self._step_event()
+        
+        if processed_data:
+            if processed_data.total_kg == 0.0:
+                if self._unloaded_since is None:
+                    self._unloaded_since = now
+            else:
+                self._unloaded_since = None
+
+    def _start_stream(self, reconnect=False):
+        """
+        Connects and starts the 0x32 stream. Calibration (and, if enabled,
+        the tare) come from the cache when this board has been seen before;
+        the calibration is then re-read in the background. Returns True
+        once the board is streaming.
+
+        With reconnect=True (a retry every RECONNECT_INTERVAL_SEC) only the
+        outcome is reported, not each step or failure.
+        """
+        progress = (lambda text: None) if reconnect else self.status_update.emit
+        
+        # --- 1. Connect ---
+        progress("Connecting to Wii Balance Board...")
+        if not self._connect(quiet=reconnect):
+            return False
+        
+        # --- 2. Set LED ---
+        progress("Connected. Setting LED...")
+        self._set_led(True, quiet=reconnect) # Turn on the solid blue light
+        
+        # --- 3. Calibrate (cached, or read now) ---
+        self.device_key = self._device_key()
+        cached = self.calibration_cache.get(self.device_key) if self.calibration_cache else None
+        if cached and cached.get("calibration"):
+            self.calibration = cached["calibration"]
+            if self.recorder:
+                self.recorder.set_calibration(self.calibration)
+        else:
+            cached = None
+            progress("Reading calibration data...")
+            if not self._read_calibration(quiet=reconnect):
+                return False
+
+        # --- 4. Set Mode ---
+        progress("Setting data mode...")
+        if not self._set_data_mode(quiet=reconnect):
+            return False
+        if cached:
+            self._request_verify()
+        
+        # --- 5. Tare (kept across reconnects, else cached, else manual) ---
+        if self.is_tared:
+            self.kernel.configure(self.calibration, self.zero_point)
+            self.status_update.emit("Reconnected. Ready!")
+        elif cached and cached.get("zero_point") and self.use_cached_tare:
+            self._apply_tare(cached["zero_point"])
+            self.tare_complete.emit(True)
+            self.status_update.emit("Using the last tare for this board. Tare again if weights look off.")
+        else:
+            self.status_update.emit("Board ready. Click 'Tare (Zero)' or press board button.")
+        self.ready_to_tare.emit()
+        return True
+
+    def _reconnect(self):
+        """Worker thread: reopens the board after the connection dropped."""
+        self.status_update.emit("Connection lost. Reconnecting...")
+        try:
+            self.device.close()
+        except Exception:
+            pass
+        self.device = None
+        if self._tare_active:
+            self._tare_active = False
+            self.tare_complete.emit(False)
+        while self.running:
+            if self._start_stream(reconnect=True):
+                return True
+            if self.device:
+                try:
+                    self.device.close()
+                except Exception:
+                    pass
+                self.device = None
+            time.sleep(RECONNECT_INTERVAL_SEC)
+        return False
+
+    def start_processing_loop(self):
+        """
+        The main processing loop; blocks until stop_processing() or a fatal
+        error. Runs on the caller's thread (see start()).
+        """
+        try:
+            if not self._start_stream():
+                return
+
+            # --- 6. Weighing Loop ---
+            self._rate_start = time.monotonic()
+            while self.running:
+                try:
+                    self._loop_once()
+                except (OSError, ValueError) as e: # hidapi: read/write error, device closed
+                    if not (self.running and self.auto_reconnect):
+                        raise
+                    print(f"Board connection lost: {e}")
+                    if not self._reconnect():
+                        break
+
+        except Exception as e:
+            if self.running:
+                self.error_occurred.emit(f"❌ Error: {e}")
+        finally:
+            if self.is_tared and self.calibration_cache and self.device_key:
+                # Keep any drift correction for the next connect
+                self.calibration_cache.store(self.device_key, zero_point=self.zero_point)
+            if self.device:
+                self._set_led(False)
+                self.device.close()
+            self.running = False
+            self.status_update.emit("Disconnected.")
+            self.finished.emit() # Tell the thread we are done
+
+    def _loop_once(self):
+        """One pass of the weighing loop."""
+        # --- Commands run between reads, on this thread ---
+        if self._tare_requested:
+            self._begin_tare()
+        
+        if self._tare_active:
+            for sensor_data in self._read_batch(self.READ_TIMEOUT_MS):
+                self._add_tare_sample(sensor_data)
+            self._update_tare()
+        
+        elif self.is_tared and self.device:
+            now = time.monotonic()
+            if self.scheduling_mode == "fixed":
+                self._step_fixed(now)
+            elif self.scheduling_mode == "low_power":
+                self._step_low_power(now)
+            else:
+                self._step_event()
+            
+            if self.drift_compensation:
+                self._track_zero(now)
+                
+        elif self._verify_packets is not None:
+            # Not tared yet, but a calibration check is in flight
+            self._read_batch(100)
+        else:
+            # Sleep if not tared to prevent busy-looping
+            time.sleep(0.1)
+        
+        now = time.monotonic()
+        self._check_verify(now)
+        self._tick_rate_meter(now)
+
+    def stop_processing(self):
+        """Stops the processing loop."""
+        self.running = False
+
+    # --- Running without Qt ---
+    def start(self):
+        """Runs the processing loop on a new daemon thread."""
+        self.running = True
+        self._thread = threading.Thread(target=self.start_processing_loop, name="BalanceBoard", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=3.0):
+        """Stops the loop started by start() and waits for it to exit."""
+        self.stop_processing()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def samples(self, latest_only=False, timeout=None):
+        """
+        Iterator over processed samples, for any thread. Yields every
+        sample (or, with latest_only, just the newest one per wakeup) until
+        the processing loop stops, or `timeout` seconds pass without one.
+        Records are reused by the ring, so copy what you keep.
+        """
+        cursor = self.sample_ring.cursor(blocking=True)
+        self.finished.connect(cursor.wake)
+        try:
+            while self.running or cursor.pending():
+                if not cursor.wait(timeout if timeout is not None else 0.5):
+                    if timeout is not None:
+                        return
+                    continue
+                if latest_only:
+                    sample = cursor.latest()
+                    if sample is not None:
+                        yield sample
+                else:
+                    yield from cursor.drain()
+        finally:
+            self.finished.disconnect(cursor.wake)
+            cursor.close()
+
+    async def stream(self, latest_only=False):
+        """
+        `async for sample in board.stream()`: samples delivered on the
+        running event loop, with one thread hop per wakeup rather than per
+        sample. Ends when the processing loop stops; same record reuse
+        caveat as samples().
+        """
+        import asyncio # Only stream() needs it, and it's slow to import
+        wakeup = _AsyncWakeup(asyncio.get_running_loop(), asyncio.Event())
+        cursor = self.sample_ring.cursor(event=wakeup)
+        self.finished.connect(wakeup.set)
+        try:
+            while self.running or cursor.pending():
+                if not cursor.pending():
+                    wakeup.event.clear()
+                    if not cursor.pending(): # Recheck after clear to avoid a lost wakeup
+                        try:
+                            await asyncio.wait_for(wakeup.event.wait(), 0.5)
+                        except asyncio.TimeoutError:
+                            continue
+                if latest_only:
+                    sample = cursor.latest()
+                    if sample is not None:
+                        yield sample
+                else:
+                    for sample in cursor.drain():
+                        yield sample
+        finally:
+            self.finished.disconnect(wakeup.set)
+            cursor.close()
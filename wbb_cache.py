@@ -0,0 +1,63 @@
+import json
+import os
+import threading
+import time
+
+class CalibrationCache:
+    """
+    Factory calibration and last tare per board, kept in a small JSON file:
+
+        {"<device key>": {"calibration": [[...], [...], [...]],
+                          "zero_point": [...], "saved_at": <time.time()>}}
+
+    The key is the board's serial number when the driver reports one, so
+    a reconnect can skip the calibration read and the tare.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(path, "r") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Ignoring unreadable calibration cache {path}: {e}")
+
+    def get(self, key):
+        """Cached entry for a board, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def store(self, key, calibration=None, zero_point=None):
+        """Updates the given fields for a board and writes the file."""
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            if calibration is not None:
+                entry["calibration"] = [list(row) for row in calibration]
+            if zero_point is not None:
+                entry["zero_point"] = list(zero_point)
+            entry["saved_at"] = time.time()
+            self._write()
+
+    def forget(self, key, field=None):
+        """Drops a board's entry, or just one field of it."""
+        with self._lock:
+            if field is None:
+                self._entries.pop(key, None)
+            elif key in self._entries:
+                self._entries[key].pop(field, None)
+            self._write()
+
+    def _write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(self._entries, f, indent=4)
+            os.replace(self.path + ".tmp", self.path)
+        except Exception as e:
+            print(f"Could not save calibration cache: {e}")
@@ -0,0 +1,131 @@
+import math
+
+# --- Smoothing filters for SensorKernel ---
+# Each filter takes the four corner weights [TR, BR, TL, BL] per report and
+# returns the filtered four, in O(1) per report. "moving_average" is
+# SensorKernel's own ring and has no class here.
+FILTERS = ("moving_average", "ema", "one_euro", "median")
+
+DEFAULT_FILTER_PARAMS = {
+    "alpha": 0.3, # ema: weight of the newest report
+    "min_cutoff_hz": 1.0, # one_euro: cutoff while standing still (less jitter)
+    "beta": 0.05, # one_euro: how fast the cutoff rises with speed (less lag)
+    "d_cutoff_hz": 1.0, # one_euro: cutoff of the speed estimate
+    "median_samples": 3, # median: window, odd
+    "report_rate_hz": 100.0, # Nominal report rate, for time-based parameters
+}
+
+class ExponentialFilter:
+    """Single-pole low-pass: y += alpha * (x - y)."""
+    name = "ema"
+
+    def __init__(self, alpha):
+        self.alpha = min(1.0, max(0.01, alpha))
+        self._state = None
+
+    def reset(self):
+        self._state = None
+
+    def apply(self, weights):
+        state = self._state
+        if state is None:
+            self._state = list(weights)
+            return list(weights)
+        a = self.alpha
+        w0, w1, w2, w3 = weights
+        state[0] += a * (w0 - state[0]); state[1] += a * (w1 - state[1])
+        state[2] += a * (w2 - state[2]); state[3] += a * (w3 - state[3])
+        return [state[0], state[1], state[2], state[3]]
+
+    def group_delay_samples(self):
+        return (1.0 - self.alpha) / self.alpha
+
+class OneEuroFilter:
+    """
+    One-euro filter (Casiez et al. 2012): an EMA whose cutoff rises with
+    the speed of the signal, so it smooths hard while the load is steady
+    and follows quickly during a step.
+    """
+    name = "one_euro"
+
+    def __init__(self, min_cutoff_hz, beta, d_cutoff_hz, report_rate_hz):
+        self.min_cutoff = min_cutoff_hz
+        self.beta = beta
+        self.rate = report_rate_hz
+        self._d_alpha = self._alpha(d_cutoff_hz)
+        self._x = None # Filtered weights
+        self._dx = [0.0, 0.0, 0.0, 0.0] # Filtered speed, kg/s
+        self._last_alpha = [self._alpha(min_cutoff_hz)] * 4
+
+    def _alpha(self, cutoff_hz):
+        tau = 1.0 / (2.0 * math.pi * cutoff_hz)
+        return 1.0 / (1.0 + tau * self.rate)
+
+    def reset(self):
+        self._x = None
+        self._dx = [0.0, 0.0, 0.0, 0.0]
+
+    def apply(self, weights):
+        x = self._x
+        if x is None:
+            self._x = list(weights)
+            return list(weights)
+        dx = self._dx
+        alphas = self._last_alpha
+        d_alpha = self._d_alpha
+        rate = self.rate
+        for i in range(4):
+            dx[i] += d_alpha * ((weights[i] - x[i]) * rate - dx[i])
+            a = self._alpha(self.min_cutoff + self.beta * abs(dx[i]))
+            x[i] += a * (weights[i] - x[i])
+            alphas[i] = a
+        return [x[0], x[1], x[2], x[3]]
+
+    def group_delay_samples(self):
+        """Delay at the current cutoff, averaged over the corners."""
+        return sum((1.0 - a) / a for a in self._last_alpha) / 4
+
+class MedianFilter:
+    """Median of the last few reports; rejects single-report spikes."""
+    name = "median"
+
+    def __init__(self, samples):
+        self.samples = max(1, int(samples) | 1) # Odd, so there's a middle
+        self.reset()
+
+    def reset(self):
+        self._rings = [[] for _ in range(4)]
+        self._head = 0
+
+    def apply(self, weights):
+        size = self.samples
+        rings = self._rings
+        head = self._head
+        out = [0.0, 0.0, 0.0, 0.0]
+        for i in range(4):
+            ring = rings[i]
+            if len(ring) < size:
+                ring.append(weights[i])
+            else:
+                ring[head] = weights[i]
+            ordered = sorted(ring)
+            out[i] = ordered[len(ordered) // 2]
+        self._head = head + 1 if head + 1 < size else 0
+        return out
+
+    def group_delay_samples(self):
+        return (self.samples - 1) / 2
+
+def make_filter(name, params):
+    """Filter instance for a profile's "filter" name, or None for the built-in moving average."""
+    params = dict(DEFAULT_FILTER_PARAMS, **(params or {}))
+    if name == "ema":
+        return ExponentialFilter(params["alpha"])
+    if name == "one_euro":
+        return OneEuroFilter(params["min_cutoff_hz"], params["beta"],
+                             params["d_cutoff_hz"], params["report_rate_hz"])
+    if name == "median":
+        return MedianFilter(params["median_samples"])
+    if name not in (None, "moving_average"):
+        print(f"Warning: Unknown filter '{name}'. Using moving_average.")
+    return None
@@ -0,0 +1,208 @@
+"""
+Headless mapper: runs the board(s) and the virtual gamepad without Qt,
+for machines where the game runs fullscreen and nobody looks
+at the GUI:
+
+    python wbb_headless.py --profile profiles/PDAFT.json
+    python wbb_headless.py --device synthetic --stats-interval 2
+
+Boards are tared automatically (from the calibration cache when the board
+has been seen before, else --tare-delay seconds after connecting, so step
+off first). Throughput and latency percentiles are printed every
+--stats-interval seconds; Ctrl+C stops.
+"""
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+
+from wbb_board import BalanceBoard, open_hid_device, discover_boards
+from wbb_input_engine import GamepadEngine, OutputScheduler, load_vgamepad, DEFAULT_PRESS_DETECTION
+from wbb_backends import device_factory, StubGamepad
+from wbb_latency import LatencyStats
+from wbb_samples import SampleRing
+from wbb_cache import CalibrationCache
+
+CACHE_DIR = "cache"
+RETRY_INTERVAL_SEC = 2.0 # Between attempts while no board answers
+STATS_STAGES = ("read", "resolve", "total")
+
+class HeadlessBoard:
+    """One board's thread, ring, engine and gamepad."""
+    def __init__(self, index, device_spec, device_path, config, scheduler, calibration_cache, tare_delay):
+        self.name = f"Board {index + 1}"
+        self.device_spec = device_spec
+        self.device_path = device_path
+        self.config = config
+        self.calibration_cache = calibration_cache
+        self.tare_delay = tare_delay
+        self.stopping = False
+
+        self.latency_stats = LatencyStats()
+        self.sample_ring = SampleRing()
+        self.gamepad = self._create_gamepad()
+        self.engine = GamepadEngine(self.gamepad, latency_stats=self.latency_stats)
+        self.engine.set_profile(
+            config.get("button_thresholds_kg", {}), config.get("button_mappings", {}),
+            config.get("combination_mappings", {}),
+            dict(DEFAULT_PRESS_DETECTION, **config.get("press_detection", {}))
+        )
+        scheduler.add(self.engine, self.sample_ring)
+
+        self.board = None
+        self.rate_hz = 0.0
+        self._thread = None
+        self._tare_timer = None
+        self._last_seq = 0
+
+    def _create_gamepad(self):
+        try:
+            vg = load_vgamepad()
+            if vg is None:
+                raise RuntimeError("vgamepad could not be loaded")
+            return vg.VX360Gamepad()
+        except Exception as e:
+            print(f"{self.name}: Could not initialize virtual gamepad: {e}")
+            if self.device_spec != "hid":
+                print(f"{self.name}: Using a stub gamepad for the simulated board.")
+                return StubGamepad()
+            return None
+
+    def _make_device_factory(self):
+        factory = device_factory(self.device_spec)
+        if factory is None and self.device_path:
+            factory = lambda: open_hid_device(self.device_path)
+        return factory
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stopping = True
+        if self._tare_timer:
+            self._tare_timer.cancel()
+        if self.board:
+            self.board.stop_processing()
+        if self._thread:
+            self._thread.join(3.0)
+        if self.gamepad:
+            self.gamepad.reset()
+            self.gamepad.update()
+
+    def _run(self):
+        """Board thread: runs the processing loop, and reopens the board if it ends early."""
+        while not self.stopping:
+            self.board = board = BalanceBoard(
+                self.config, sample_ring=self.sample_ring, latency_stats=self.latency_stats,
+                device_factory=self._make_device_factory(), calibration_cache=self.calibration_cache,
+                device_path=self.device_path
+            )
+            # Callbacks run on this thread
+            board.status_update.connect(self._on_status)
+            board.error_occurred.connect(self._on_status)
+            board.ready_to_tare.connect(self._on_ready)
+            board.tare_complete.connect(self._on_tare_complete)
+            board.rate_measured.connect(self._on_rate)
+
+            if self.stopping: # stop() ran while the board was being set up
+                break
+            board.start_processing_loop()
+            if not self.stopping:
+                time.sleep(RETRY_INTERVAL_SEC)
+
+    def _on_status(self, text):
+        print(f"{self.name}: {text}")
+
+    def _on_ready(self):
+        board = self.board
+        if board.is_tared:
+            return
+        print(f"{self.name}: Taring in {self.tare_delay:.0f} s. Please step OFF the board.")
+        self._tare_timer = threading.Timer(self.tare_delay, board.request_tare)
+        self._tare_timer.daemon = True
+        self._tare_timer.start()
+
+    def _on_tare_complete(self, success):
+        if not success:
+            print(f"{self.name}: Tare failed. Retrying...")
+            self._on_ready()
+
+    def _on_rate(self, rate_hz):
+        self.rate_hz = rate_hz
+
+    def stats_line(self, interval):
+        """Throughput since the last call, flushes and latency percentiles."""
+        seq = self.sample_ring.write_seq
+        samples_per_sec = (seq - self._last_seq) / interval
+        self._last_seq = seq
+        parts = [
+            f"{self.name}: {samples_per_sec:.1f} samples/s",
+            f"{self.engine.flushes} flushes ({self.engine.skipped_flushes} skipped)",
+        ]
+        summary = self.latency_stats.summary()
+        for stage in STATS_STAGES:
+            stats = summary[stage]
+            if stats:
+                parts.append(f"{stage} {stats[0]:.0f}/{stats[1]:.0f}/{stats[2]:.0f} µs")
+        return " | ".join(parts)
+
+def load_profile(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Wii Balance Board XInput mapper without the GUI.")
+    parser.add_argument("--profile", action="append",
+                        help="Profile JSON (default: profiles/user_config.json, else default_config.json); "
+                             "repeat to give each board its own")
+    parser.add_argument("--device", action="append",
+                        help="hid (default, every connected board), replay:<capture>[@speed] or "
+                             "synthetic[@speed]; repeat for several boards")
+    parser.add_argument("--tare-delay", type=float, default=3.0,
+                        help="Seconds to step off before the automatic tare")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                        help="Seconds between stats lines (0 turns them off)")
+    args = parser.parse_args()
+
+    profiles = args.profile or [
+        next((p for p in ("profiles/user_config.json", "profiles/default_config.json") if os.path.exists(p)),
+             "profiles/default_config.json")
+    ]
+    configs = [load_profile(path) for path in profiles]
+
+    scheduler = OutputScheduler()
+    calibration_cache = CalibrationCache(os.path.join(CACHE_DIR, "boards.json"))
+    boards = [
+        HeadlessBoard(i, spec, path, configs[min(i, len(configs) - 1)], scheduler,
+                      calibration_cache, args.tare_delay)
+        for i, (spec, path) in enumerate(discover_boards(args.device or ["hid"]))
+    ]
+    print(f"Running {len(boards)} board(s) with {', '.join(profiles)}. Ctrl+C stops.")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    scheduler.start()
+    for board in boards:
+        board.start()
+
+    # Finite waits: a blocked wait() can't see Ctrl+C on Windows
+    interval = args.stats_interval if args.stats_interval > 0 else 1.0
+    while not stop.wait(interval):
+        if args.stats_interval > 0:
+            for board in boards:
+                print(board.stats_line(interval))
+
+    print("Stopping...")
+    for board in boards:
+        board.stopping = True
+    for board in boards:
+        board.stop()
+    scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import enum
+import threading
+import time
+
+class XUSB_BUTTON(enum.IntFlag):
+    """
+    Same values as vgamepad.XUSB_BUTTON, so mappings resolve without
+    importing vgamepad (slow to load; see load_vgamepad).
+    """
+    XUSB_GAMEPAD_DPAD_UP = 0x0001
+    XUSB_GAMEPAD_DPAD_DOWN = 0x0002
+    XUSB_GAMEPAD_DPAD_LEFT = 0x0004
+    XUSB_GAMEPAD_DPAD_RIGHT = 0x0008
+    XUSB_GAMEPAD_START = 0x0010
+    XUSB_GAMEPAD_BACK = 0x0020
+    XUSB_GAMEPAD_LEFT_THUMB = 0x0040
+    XUSB_GAMEPAD_RIGHT_THUMB = 0x0080
+    XUSB_GAMEPAD_LEFT_SHOULDER = 0x0100
+    XUSB_GAMEPAD_RIGHT_SHOULDER = 0x0200
+    XUSB_GAMEPAD_GUIDE = 0x0400
+    XUSB_GAMEPAD_A = 0x1000
+    XUSB_GAMEPAD_B = 0x2000
+    XUSB_GAMEPAD_X = 0x4000
+    XUSB_GAMEPAD_Y = 0x8000
+
+def load_vgamepad():
+    """
+    Imports vgamepad on first use (it loads the ViGEm client DLL).
+    Returns the module, or None when vgamepad/ViGEm is unavailable,
+    e.g. on a headless Linux box.
+    """
+    try:
+        import vgamepad
+        return vgamepad
+    except Exception as e:
+        print(f"vgamepad could not be loaded: {e}")
+        return None
+
+# --- Press detection defaults (profile "press_detection") ---
+# hysteresis_kg: a pressed corner releases at threshold - hysteresis_kg (at least 0 kg)
+# min_hold_ms:   a press is held at least this long, even if the load drops
+# fast_press:    press on the unsmoothed kg, skipping the averaging lag
+DEFAULT_PRESS_DETECTION = {"hysteresis_kg": 0.0, "min_hold_ms": 0, "fast_press": False}
+
+# --- Data for Loops ---
+# Order also defines the press mask bits: top_left = 1, bottom_left = 2, ...
+QUADRANT_KEYS = ("top_left", "bottom_left", "top_right", "bottom_right")
+
+class GamepadEngine:
+    """
+    Drives one virtual Xbox 360 gamepad from one board's samples.
+
+    An OutputScheduler gives the engine a cursor on the board's
+    SampleRing and calls process() with the newest sample on its own
+    thread. The engine resolves thresholds and combos and pushes the
+    result to ViGEm without going through the Qt event loop, so GUI
+    repaints can't delay inputs.
+    """
+
+    ALL_DPAD_BUTTONS = {
+        "DPAD_UP", "DPAD_DOWN", "DPAD_LEFT", "DPAD_RIGHT"
+    }
+
+    COMBO_DEFINITIONS = [
+        ({"top_left", "top_right"}, "top_left_top_right"),
+        ({"bottom_left", "bottom_right"}, "bottom_left_bottom_right"),
+        ({"top_left", "bottom_left"}, "top_left_bottom_left"),
+        ({"top_right", "bottom_right"}, "top_right_bottom_right"),
+        ({"top_left", "bottom_right"}, "top_left_bottom_right"),
+        ({"top_right", "bottom_left"}, "top_right_bottom_left"),
+    ]
+
+    COMBO_ACTIONS = {
+        "LS_UP": (0, 32767, None),
+        "LS_DOWN": (0, -32767, None),
+        "LS_LEFT": (-32767, 0, None),
+        "LS_RIGHT": (32767, 0, None),
+        "LS_UP_LEFT": (-32767, 32767, None),
+        "LS_UP_RIGHT": (32767, 32767, None),
+        "LS_DOWN_LEFT": (-32767, -32767, None),
+        "LS_DOWN_RIGHT": (32767, -32767, None),
+        "DPAD_UP": (0, 0, "DPAD_UP"),
+        "DPAD_DOWN": (0, 0, "DPAD_DOWN"),
+        "DPAD_LEFT": (0, 0, "DPAD_LEFT"),
+        "DPAD_RIGHT": (0, 0, "DPAD_RIGHT"),
+    }
+
+    def __init__(self, gamepad=None, latency_stats=None):
+        self.gamepad = gamepad # May be None if ViGEmBus is missing
+        self.latency = latency_stats # Optional wbb_latency.LatencyStats
+        self.thresholds = {}
+        self.button_mappings = {}
+        self.combination_mappings = {}
+        self.press_detection = dict(DEFAULT_PRESS_DETECTION)
+
+        # Last resolved press states, read by the GUI for display only
+        self.press_states = {key: False for key in QUADRANT_KEYS}
+        
+        # --- Compiled profile (see compile_profile) ---
+        self._threshold_values = (10.0, 10.0, 10.0, 10.0)
+        self._release_values = (10.0, 10.0, 10.0, 10.0)
+        self._min_hold = 0.0
+        self._fast_press = False
+        self._plain_thresholds = True # No hysteresis/hold/fast press: stateless compare
+        self._table = []
+        
+        # --- Press state machine (see _update_press_mask) ---
+        self._mask = 0
+        self._pressed_at = [0.0, 0.0, 0.0, 0.0]
+        
+        # --- Diff-based output: skip the driver when nothing changed ---
+        self._last_report = None # (buttons bitmask, ls_x, ls_y) last flushed
+        self.flushes = 0
+        self.skipped_flushes = 0
+        
+        self.compile_profile()
+
+        # --- Ring reader, set by OutputScheduler.add ---
+        self.cursor = None
+
+    def set_profile(self, thresholds, button_mappings, combination_mappings, press_detection=None):
+        """Swaps in the mapping tables used to resolve samples."""
+        self.thresholds = thresholds
+        self.button_mappings = button_mappings
+        self.combination_mappings = combination_mappings
+        if press_detection is not None:
+            self.press_detection = press_detection
+        self.compile_profile()
+
+    def compile_profile(self):
+        """
+        Precomputes the gamepad output for all 16 combinations of pressed
+        quadrants. Must be called again whenever thresholds or mappings
+        change. Resolving a sample is then a mask and one table lookup.
+
+        Each entry is (press_states, report, buttons_to_press,
+        buttons_to_release, ls_x, ls_y), with buttons already resolved to
+        XUSB_BUTTON values and report = (pressed bitmask, ls_x, ls_y).
+        """
+        table = []
+        for mask in range(16):
+            pressed_quadrants = {key for bit, key in enumerate(QUADRANT_KEYS) if mask & (1 << bit)}
+            press_states = {key: key in pressed_quadrants for key in QUADRANT_KEYS}
+            
+            ls_x, ls_y = 0, 0
+            dpad_buttons_to_press = set()
+            buttons_to_press_str = set()
+
+            # --- Combination Logic ---
+            combos_activated = set()
+            for quadrants, mapping_key in self.COMBO_DEFINITIONS:
+                if quadrants.issubset(pressed_quadrants - combos_activated):
+                    mapping = self.combination_mappings.get(mapping_key)
+                    if mapping and mapping != "None":
+                        ls_x, ls_y, dpad_buttons_to_press = self._apply_combo_mapping(mapping, ls_x, ls_y, dpad_buttons_to_press)
+                        combos_activated.update(quadrants)
+
+            # --- Individual Button Logic ---
+            remaining_pressed = pressed_quadrants - combos_activated
+
+            for quad in remaining_pressed:
+                mapping = self.button_mappings.get(quad)
+                if mapping and mapping != "None":
+                    buttons_to_press_str.add(mapping)
+
+            managed_buttons_str = set(self.button_mappings.values())
+            buttons_to_release_str = managed_buttons_str - buttons_to_press_str
+            dpad_buttons_to_release = self.ALL_DPAD_BUTTONS - dpad_buttons_to_press
+            
+            dpad_prefix = "XUSB_GAMEPAD_"
+            buttons_to_press = (
+                self._resolve_buttons(buttons_to_press_str) +
+                self._resolve_buttons(dpad_buttons_to_press, prefix=dpad_prefix)
+            )
+            buttons_to_release = (
+                self._resolve_buttons(buttons_to_release_str) +
+                self._resolve_buttons(dpad_buttons_to_release, prefix=dpad_prefix)
+            )
+            
+            buttons_mask = 0
+            for button in buttons_to_press:
+                buttons_mask |= int(button)
+            report = (buttons_mask, ls_x, ls_y)
+            
+            table.append((press_states, report, buttons_to_press, buttons_to_release, ls_x, ls_y))
+        
+        self._threshold_values = tuple(self.thresholds.get(key, 10.0) for key in QUADRANT_KEYS)
+        
+        detection = dict(DEFAULT_PRESS_DETECTION, **self.press_detection)
+        hysteresis = max(0.0, float(detection["hysteresis_kg"]))
+        # Unloaded corners read 0 kg, so a release level below that would never be reached
+        self._release_values = tuple(max(0.0, value - hysteresis) for value in self._threshold_values)
+        self._min_hold = max(0.0, float(detection["min_hold_ms"])) / 1000.0
+        self._fast_press = bool(detection["fast_press"])
+        self._plain_thresholds = not (hysteresis or self._min_hold or self._fast_press)
+        
+        self._table = table
+        self._last_report = None # Release sets may have changed; flush once
+
+    def _apply_combo_mapping(self, mapping_str, x, y, dpad_set):
+        """Uses a dispatch dictionary to apply combo actions."""
+        action = self.COMBO_ACTIONS.get(mapping_str)
+        if action:
+            dx, dy, dpad = action
+            if dx: x = dx
+            if dy: y = dy
+            if dpad: dpad_set.add(dpad)
+        return x, y, dpad_set
+
+    def _resolve_buttons(self, button_set, enum_base=XUSB_BUTTON, prefix=""):
+        """Turns button names into XUSB_BUTTON values, skipping unknown ones."""
+        resolved = []
+        for button_str in button_set:
+            if not button_str: continue
+            # Handle D-Pad prefixing
+            enum_key = f"{prefix}{button_str}" if prefix else button_str
+            button_enum = getattr(enum_base, enum_key, None)
+            if button_enum:
+                resolved.append(button_enum)
+        return tuple(resolved)
+
+    def _update_press_mask(self, data, now):
+        """
+        Per-corner press state machine. A corner presses above its
+        threshold (on the unsmoothed kg with fast_press) and releases once
+        the smoothed kg is at or below threshold - hysteresis_kg, but not
+        before it has been held for min_hold_ms. With fast_press the
+        unsmoothed kg must be down there too, or a step would release
+        again while the average is still catching up.
+        """
+        values = (data.top_left, data.bottom_left, data.top_right, data.bottom_right)
+        press_values = values
+        if self._fast_press and data.unsmoothed:
+            tr, br, tl, bl = data.unsmoothed
+            press_values = (tl, bl, tr, br)
+        
+        mask = self._mask
+        pressed_at = self._pressed_at
+        thresholds = self._threshold_values
+        for bit in range(4):
+            flag = 1 << bit
+            if mask & flag:
+                release = self._release_values[bit]
+                if (values[bit] <= release and press_values[bit] <= release
+                        and now - pressed_at[bit] >= self._min_hold):
+                    mask &= ~flag
+            elif press_values[bit] > thresholds[bit] or values[bit] > thresholds[bit]:
+                mask |= flag
+                pressed_at[bit] = now
+        self._mask = mask
+        return mask
+
+    def process(self, data):
+        """Resolves one sample into press states and gamepad output."""
+        t_start = time.perf_counter()
+        latency = self.latency
+        if latency and data.t_ready:
+            latency.record("delivery", t_start - data.t_ready)
+        
+        if self._plain_thresholds:
+            t_tl, t_bl, t_tr, t_br = self._threshold_values
+            mask = (
+                (data.top_left > t_tl) | (data.bottom_left > t_bl) << 1 |
+                (data.top_right > t_tr) << 2 | (data.bottom_right > t_br) << 3
+            )
+            self._mask = mask
+        else:
+            mask = self._update_press_mask(data, data.t_read or t_start)
+        press_states, report, buttons_to_press, buttons_to_release, ls_x, ls_y = self._table[mask]
+        self.press_states = press_states
+
+        gamepad = self.gamepad
+        if not gamepad or report == self._last_report:
+            # Controller state is already current; no driver round-trip
+            if gamepad:
+                self.skipped_flushes += 1
+            if latency:
+                latency.record("resolve", time.perf_counter() - t_start)
+            return
+
+        # --- Apply Gamepad State ---
+        gamepad.left_joystick(x_value=ls_x, y_value=ls_y)
+        for button in buttons_to_press:
+            gamepad.press_button(button=button)
+        for button in buttons_to_release:
+            gamepad.release_button(button=button)
+
+        t_resolved = time.perf_counter()
+        gamepad.update()
+        self._last_report = report
+        self.flushes += 1
+        
+        if latency:
+            t_flushed = time.perf_counter()
+            latency.record("resolve", t_resolved - t_start)
+            latency.record("flush", t_flushed - t_resolved)
+            if data.t_read:
+                latency.record("total", t_flushed - data.t_read)
+
+class OutputScheduler:
+    """
+    One output thread for every board's GamepadEngine.
+
+    Each engine reads its board's SampleRing through a cursor that shares
+    the scheduler's wakeup Event. On every wakeup the thread resolves
+    only the newest sample of each board that has one, so a busy board
+    can't queue work in front of another. Flushes that wouldn't change a
+    pad are skipped (see GamepadEngine.process), which keeps a pass over
+    N boards to a few microseconds.
+    """
+    def __init__(self):
+        self._engines = [] # Replaced, never mutated, so the thread can iterate safely
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def add(self, engine, sample_ring):
+        """Starts feeding `engine` from the newest end of `sample_ring`."""
+        engine.cursor = sample_ring.cursor(event=self._wakeup)
+        self._engines = self._engines + [engine]
+
+    def remove(self, engine):
+        self._engines = [e for e in self._engines if e is not engine]
+        if engine.cursor:
+            engine.cursor.close()
+            engine.cursor = None
+
+    def start(self):
+        """Starts the output thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="OutputScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the output thread and waits for it to exit."""
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _run(self):
+        wakeup = self._wakeup
+        while self._running:
+            wakeup.wait(0.5)
+            # Clear before scanning: a sample published during the scan sets it again
+            wakeup.clear()
+            for engine in self._engines:
+                cursor = engine.cursor
+                data = cursor.latest() if cursor else None
+                if data is None:
+                    continue
+                try:
+                    engine.process(data)
+                except Exception as e:
+                    print(f"Gamepad engine error: {e}")
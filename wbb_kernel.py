@@ -0,0 +1,154 @@
+from wbb_samples import Sample
+from wbb_filters import DEFAULT_FILTER_PARAMS, make_filter
+
+# --- Corner order used throughout the pipeline: [TR, BR, TL, BL] ---
+CORNERS = 4
+
+class SensorKernel:
+    """
+    Calibration, smoothing and CoM math for the sensor pipeline.
+
+    Per-corner calibration terms are precomputed once (on tare), and the
+    moving average is a preallocated ring with running sums, so each sample
+    costs a fixed amount of work regardless of averaging_samples.
+    
+    `filter_name` swaps the moving average for one of wbb_filters (ema,
+    one_euro, median); smooth() then runs that filter instead.
+    """
+    def __init__(self, averaging_samples, dead_zone_kg, filter_name="moving_average", filter_params=None):
+        self.window = max(1, int(averaging_samples))
+        self.dead_zone_kg = dead_zone_kg
+        self.report_rate_hz = dict(DEFAULT_FILTER_PARAMS, **(filter_params or {}))["report_rate_hz"]
+        
+        # --- Optional filter replacing the moving average ---
+        self.filter = make_filter(filter_name, filter_params)
+        self.filter_name = self.filter.name if self.filter else "moving_average"
+        # Reports that can still affect the output; None means all of them
+        self.history = self.window
+        if self.filter:
+            self.smooth = self.filter.apply
+            self.history = getattr(self.filter, "samples", None)
+
+        # (zero, delta_17, delta_17_to_34) per corner, None until configured
+        self._terms = None
+
+        # --- Smoothing ring: one preallocated list per corner ---
+        self._rings = [[0.0] * self.window for _ in range(CORNERS)]
+        self._sums = [0.0] * CORNERS
+        self._head = 0
+        self._filled = 0
+
+    def configure(self, calibration, zero_point):
+        """Precomputes per-corner terms from the factory calibration and tare."""
+        if not calibration or not zero_point:
+            self._terms = None
+            return
+
+        terms = []
+        for i in range(CORNERS):
+            cal_0 = calibration[0][i]
+            delta_17 = calibration[1][i] - cal_0
+            delta_34 = calibration[2][i] - cal_0
+            terms.append((zero_point[i], delta_17, delta_34 - delta_17))
+        self._terms = terms
+
+    def reset(self):
+        """Clears the smoothing window."""
+        if self.filter:
+            self.filter.reset()
+        for ring in self._rings:
+            for i in range(self.window):
+                ring[i] = 0.0
+        self._sums = [0.0] * CORNERS
+        self._head = 0
+        self._filled = 0
+
+    def calculate_weights(self, raw_values):
+        """Interpolates raw sensor values to kg. Same math as the per-corner branches it replaces."""
+        terms = self._terms
+        if terms is None:
+            return [0.0] * CORNERS
+
+        weights_kg = [0.0] * CORNERS
+        i = 0
+        for zero, delta_17, delta_upper in terms:
+            raw_diff = raw_values[i] - zero
+            if delta_17 != 0:
+                if raw_diff < delta_17:
+                    weight = 17.0 * (raw_diff / delta_17)
+                    weights_kg[i] = weight if weight >= 0 else 0.0
+                elif delta_upper != 0:
+                    weight = 17.0 + 17.0 * ((raw_diff - delta_17) / delta_upper)
+                    weights_kg[i] = weight if weight >= 0 else 0.0
+            i += 1
+
+        return weights_kg
+
+    def smooth(self, weights):
+        """Pushes one sample into the window and returns the per-corner means."""
+        w0, w1, w2, w3 = weights
+        r0, r1, r2, r3 = self._rings
+        sums = self._sums
+        h = self._head
+
+        if self._filled < self.window:
+            self._filled += 1
+            sums[0] += w0; sums[1] += w1; sums[2] += w2; sums[3] += w3
+        else:
+            sums[0] += w0 - r0[h]; sums[1] += w1 - r1[h]
+            sums[2] += w2 - r2[h]; sums[3] += w3 - r3[h]
+        r0[h] = w0; r1[h] = w1; r2[h] = w2; r3[h] = w3
+
+        h += 1
+        if h == self.window:
+            h = 0
+            # Re-sum once per wrap so rounding error in the running totals can't build up
+            sums[0] = sum(r0); sums[1] = sum(r1); sums[2] = sum(r2); sums[3] = sum(r3)
+        self._head = h
+
+        count = self._filled
+        return [sums[0] / count, sums[1] / count, sums[2] / count, sums[3] / count]
+
+    def group_delay_samples(self):
+        """Effective delay of the smoothing stage, in reports."""
+        if self.filter:
+            return self.filter.group_delay_samples()
+        return (self.window - 1) / 2
+
+    def group_delay_sec(self):
+        return self.group_delay_samples() / self.report_rate_hz
+
+    def processed(self, weights, sample=None):
+        """
+        Calculates Total Weight and CoM from the provided weights, writing
+        into `sample` (e.g. a SampleRing slot) or a new Sample.
+        """
+        tr, br, tl, bl = weights
+        total_kg = tr + br + tl + bl
+
+        if total_kg < self.dead_zone_kg:
+            total_kg = 0.0
+            tr = br = tl = bl = 0.0
+            x_pos, y_pos = 0.0, 0.0
+        else:
+            # X-axis: (Right - Left)
+            x_pos = ((tr + br) - (tl + bl)) / total_kg
+            # Y-axis: (Top - Bottom)
+            y_pos = ((tr + tl) - (br + bl)) / total_kg
+
+            # Clamp CoM to -1.0 to 1.0
+            if x_pos > 1.0: x_pos = 1.0
+            elif x_pos < -1.0: x_pos = -1.0
+            if y_pos > 1.0: y_pos = 1.0
+            elif y_pos < -1.0: y_pos = -1.0
+
+        if sample is None:
+            sample = Sample()
+        sample.total_kg = total_kg
+        sample.top_right = tr
+        sample.bottom_right = br
+        sample.top_left = tl
+        sample.bottom_left = bl
+        sample.com_x = x_pos
+        sample.com_y = y_pos
+        return sample
@@ -0,0 +1,69 @@
+import json
+import time
+
+# --- Pipeline stages, in order. "total" is HID report -> gamepad.update() ---
+STAGES = ("read", "parse", "calibrate", "smooth", "delivery", "resolve", "flush", "total")
+
+class LatencyStats:
+    """
+    Rolling latency windows for each pipeline stage.
+
+    Every stage keeps the last `window` durations in a preallocated ring.
+    Each stage is written from a single thread (board or engine), so
+    recording is just an index bump. Percentiles are computed on demand,
+    e.g. once a second for the diagnostics panel.
+    """
+    def __init__(self, window=2048):
+        self.window = window
+        self._rings = {stage: [0.0] * window for stage in STAGES}
+        self._heads = {stage: 0 for stage in STAGES}
+        self._counts = {stage: 0 for stage in STAGES}
+
+    def record(self, stage, seconds):
+        """Adds one duration (in seconds) to a stage's window."""
+        head = self._heads[stage]
+        self._rings[stage][head] = seconds
+        self._heads[stage] = (head + 1) % self.window
+        self._counts[stage] += 1
+
+    def reset(self):
+        for stage in STAGES:
+            self._heads[stage] = 0
+            self._counts[stage] = 0
+
+    def _values(self, stage):
+        count = min(self._counts[stage], self.window)
+        return self._rings[stage][:count]
+
+    def percentiles(self, stage, points=(50, 95, 99)):
+        """Returns the requested percentiles of a stage in microseconds, or None if empty."""
+        values = sorted(self._values(stage))
+        if not values:
+            return None
+        last = len(values) - 1
+        return tuple(values[round(last * p / 100)] * 1e6 for p in points)
+
+    def summary(self):
+        """{stage: (p50_us, p95_us, p99_us) or None} for every stage."""
+        return {stage: self.percentiles(stage) for stage in STAGES}
+
+    def export(self, path):
+        """Writes percentiles and the raw windows (in microseconds) to a JSON file."""
+        report = {
+            "exported_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "window": self.window,
+            "stages": {}
+        }
+        for stage in STAGES:
+            values = self._values(stage)
+            stats = self.percentiles(stage)
+            report["stages"][stage] = {
+                "count": self._counts[stage],
+                "p50_us": stats[0] if stats else None,
+                "p95_us": stats[1] if stats else None,
+                "p99_us": stats[2] if stats else None,
+                "max_us": max(values) * 1e6 if values else None,
+                "samples_us": [round(v * 1e6, 2) for v in values],
+            }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=4)
@@ -0,0 +1,139 @@
+import threading
+
+class Sample:
+    """
+    One processed board reading with a fixed layout.
+
+    Replaces the nested dict that used to be built per report. Records
+    normally live in a SampleRing and are reused, so consumers should
+    read them promptly rather than hold on to them.
+    """
+    __slots__ = (
+        "total_kg",
+        "top_right", "bottom_right", "top_left", "bottom_left", # kg per corner
+        "com_x", "com_y", # Center of mass, -1.0 to 1.0
+        "t_read", "t_ready", # perf_counter() stamps for latency stats
+        "unsmoothed", # [TR, BR, TL, BL] kg before smoothing, or None
+    )
+
+    def __init__(self):
+        self.total_kg = 0.0
+        self.top_right = self.bottom_right = self.top_left = self.bottom_left = 0.0
+        self.com_x = self.com_y = 0.0
+        self.t_read = self.t_ready = 0.0
+        self.unsmoothed = None
+
+    def as_dict(self):
+        """Old dict layout, for logging and debugging."""
+        return {
+            "total_kg": self.total_kg,
+            "quadrants_kg": {
+                "top_right": self.top_right, "bottom_right": self.bottom_right,
+                "top_left": self.top_left, "bottom_left": self.bottom_left,
+            },
+            "center_of_mass": (self.com_x, self.com_y)
+        }
+
+class SampleRing:
+    """
+    Single-producer, multi-consumer ring of preallocated Sample records.
+
+    The board thread fills claim() in place and then calls publish().
+    Consumers each hold a RingCursor and read at their own pace. Nothing
+    here takes a lock on the data path: the producer only bumps
+    `write_seq` after the record is written, and a reader that falls more
+    than `size - 1` samples behind is told so instead of slowing the
+    producer down.
+    """
+    def __init__(self, size=256):
+        self._records = [Sample() for _ in range(size)]
+        self.size = size
+        self.write_seq = 0 # Samples published so far
+        self._wakeups = [] # threading.Event per blocking cursor
+
+    def claim(self):
+        """Producer: the record that the next publish() will expose."""
+        return self._records[self.write_seq % self.size]
+
+    def publish(self):
+        """Producer: makes the claimed record visible to every cursor."""
+        self.write_seq += 1
+        for event in self._wakeups:
+            event.set()
+
+    def cursor(self, blocking=False, event=None):
+        """
+        New consumer positioned at the current end of the stream. Blocking
+        cursors get a wakeup Event; pass `event` to share one between rings.
+        """
+        return RingCursor(self, blocking, event)
+
+    def record(self, seq):
+        return self._records[seq % self.size]
+
+class RingCursor:
+    """
+    One consumer's read position in a SampleRing.
+
+    `skipped` counts samples passed over by latest(). `overruns` counts
+    the times the producer lapped this cursor, and `dropped` counts the
+    samples lost when it did.
+    """
+    def __init__(self, ring, blocking=False, event=None):
+        self.ring = ring
+        self.next_seq = ring.write_seq
+        self.skipped = 0
+        self.overruns = 0
+        self.dropped = 0
+        self._event = event
+        if blocking and event is None:
+            self._event = threading.Event()
+        if self._event:
+            ring._wakeups.append(self._event)
+
+    def pending(self):
+        """Number of published samples this cursor has not consumed."""
+        return self.ring.write_seq - self.next_seq
+
+    def latest(self):
+        """Newest unread sample, or None. Older unread samples are skipped."""
+        write_seq = self.ring.write_seq
+        if write_seq == self.next_seq:
+            return None
+        self.skipped += write_seq - self.next_seq - 1
+        self.next_seq = write_seq
+        return self.ring.record(write_seq - 1)
+
+    def drain(self):
+        """Yields every unread sample, oldest first."""
+        ring = self.ring
+        while self.next_seq < ring.write_seq:
+            behind = ring.write_seq - self.next_seq
+            if behind >= ring.size:
+                # The oldest slots are being rewritten; jump to what's still intact
+                self.overruns += 1
+                self.dropped += behind - (ring.size - 1)
+                self.next_seq = ring.write_seq - (ring.size - 1)
+            seq = self.next_seq
+            self.next_seq = seq + 1
+            yield ring.record(seq)
+
+    def wait(self, timeout=None):
+        """Blocking cursors: sleeps until a sample is pending or wake() is called."""
+        event = self._event
+        if event is None or self.pending():
+            return self.pending() > 0
+        event.clear()
+        if not self.pending(): # Recheck after clear to avoid a lost wakeup
+            event.wait(timeout)
+        return self.pending() > 0
+
+    def wake(self):
+        """Releases a thread blocked in wait(), e.g. on shutdown."""
+        if self._event:
+            self._event.set()
+
+    def close(self):
+        if self._event and self._event in self.ring._wakeups:
+            self.ring._wakeups.remove(self._event)
+            self._event = None
@@ -0,0 +1,199 @@
+import array
+import json
+import os
+import sys
+import threading
+import time
+
+# --- Session Format ---
+# A session is a directory holding header.json plus one flat binary file per
+# column. Columns are plain little/native-endian arrays with no framing, so
+# a reader can memory-map each one directly (see wbb_session_reader).
+SESSION_VERSION = 1
+HEADER_FILE = "header.json"
+
+# (column, array typecode, numpy dtype)
+# "raw" holds the four 16-bit sensor values of each 0x32 report, as
+# decoded by the board, not the report bytes themselves; the button and
+# extension bytes are not kept. Calibration and tares go in the header.
+RAW_COLUMNS = (
+    ("t", "d", "f8"), # perf_counter() seconds since session start
+    ("top_right", "h", "i2"), ("bottom_right", "h", "i2"),
+    ("top_left", "h", "i2"), ("bottom_left", "h", "i2"),
+)
+SAMPLE_COLUMNS = (
+    ("t", "d", "f8"), # Arrival of the report the sample was computed from
+    ("t_ready", "d", "f8"), # Sample handed to consumers
+    ("total_kg", "f", "f4"),
+    ("top_right", "f", "f4"), ("bottom_right", "f", "f4"),
+    ("top_left", "f", "f4"), ("bottom_left", "f", "f4"),
+    ("com_x", "f", "f4"), ("com_y", "f", "f4"),
+)
+
+def column_path(session_dir, stream, column):
+    """File holding one column, e.g. <session>/samples_total_kg.bin."""
+    return os.path.join(session_dir, f"{stream}_{column}.bin")
+
+class SessionRecorder:
+    """
+    Records a play session: the raw sensor values of every 0x32 report
+    and every processed sample, with perf_counter() timestamps relative
+    to the session start.
+
+    Processed samples are read from the board's SampleRing by the writer
+    thread itself, so the board pays nothing for them. Raw reports are
+    appended by the board thread into in-memory arrays (add_raw) that
+    the writer swaps out and writes every `flush_interval` seconds.
+    """
+    def __init__(self, session_dir, sample_ring, config=None, flush_interval=0.25):
+        self.session_dir = session_dir
+        self.flush_interval = flush_interval
+        self.cursor = sample_ring.cursor()
+        self.t0 = time.perf_counter()
+        self.started_at = time.time()
+
+        config = config or {}
+        self.header = {
+            "version": SESSION_VERSION,
+            "byteorder": sys.byteorder,
+            "started_at": self.started_at,
+            "calibration": [],
+            "zero_point": [],
+            "tares": [], # {"t": seconds, "zero_point": [...]} per completed tare
+            "zero_updates": [], # Same, per drift correction of 10 g or more
+            "averaging_samples": config.get("averaging_samples", 5),
+            "dead_zone_kg": config.get("dead_zone_kg", 0.2),
+            "filter": config.get("filter", "moving_average"),
+            "filter_params": config.get("filter_params", {}),
+            "button_thresholds_kg": config.get("button_thresholds_kg", {}),
+            "columns": {
+                "raw": {name: dtype for name, _, dtype in RAW_COLUMNS},
+                "samples": {name: dtype for name, _, dtype in SAMPLE_COLUMNS},
+            },
+            "counts": {"raw": 0, "samples": 0},
+            "overruns": 0,
+            "dropped": 0,
+        }
+        self._header_dirty = True
+
+        # --- Raw reports, filled by the board thread ---
+        self._raw_lock = threading.Lock() # Only contended during a swap
+        self._raw = self._new_raw_arrays()
+
+        self._files = {}
+        self._running = False
+        self._thread = None
+        self.error = None # Why writing failed; recording has stopped (checked by the GUI)
+
+    @staticmethod
+    def _new_raw_arrays():
+        return [array.array(code) for _, code, _ in RAW_COLUMNS]
+
+    def start(self):
+        os.makedirs(self.session_dir, exist_ok=True)
+        for stream, columns in (("raw", RAW_COLUMNS), ("samples", SAMPLE_COLUMNS)):
+            for name, _, _ in columns:
+                self._files[(stream, name)] = open(column_path(self.session_dir, stream, name), "ab")
+        self._write_header()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Writes everything still buffered, finalizes the header and closes the files."""
+        self._running = False
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+        try:
+            self._flush()
+            self._write_header()
+        except Exception as e:
+            self.error = self.error or e
+            print(f"Session recorder error: {e}")
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    # --- Board thread hooks ---
+    def set_calibration(self, calibration):
+        self.header["calibration"] = [list(row) for row in calibration]
+        self._header_dirty = True
+
+    def add_tare(self, zero_point):
+        zero_point = list(zero_point)
+        self.header["zero_point"] = zero_point
+        self.header["tares"].append({"t": time.perf_counter() - self.t0, "zero_point": zero_point})
+        self._header_dirty = True
+
+    def add_zero_update(self, zero_point):
+        """Drift correction: a new zero point without a tare (smoothing carries on)."""
+        zero_point = list(zero_point)
+        self.header["zero_point"] = zero_point
+        self.header["zero_updates"].append({"t": time.perf_counter() - self.t0, "zero_point": zero_point})
+        self._header_dirty = True
+
+    def add_raw(self, t_arrival, batch):
+        """Appends a batch of [TR, BR, TL, BL] raw values that arrived at t_arrival."""
+        if self.error: # Nothing is written any more; don't pile up reports
+            return
+        t = t_arrival - self.t0
+        with self._raw_lock:
+            t_col, tr_col, br_col, tl_col, bl_col = self._raw
+            for tr, br, tl, bl in batch:
+                t_col.append(t)
+                tr_col.append(tr)
+                br_col.append(br)
+                tl_col.append(tl)
+                bl_col.append(bl)
+
+    # --- Writer thread ---
+    def _run(self):
+        while self._running:
+            time.sleep(self.flush_interval)
+            try:
+                self._flush()
+                if self._header_dirty:
+                    self._write_header()
+            except Exception as e:
+                print(f"Session recorder error: {e}")
+                self.error = e
+                self._running = False
+
+    def _flush(self):
+        with self._raw_lock:
+            raw, self._raw = self._raw, self._new_raw_arrays()
+        if raw[0]:
+            for (name, _, _), values in zip(RAW_COLUMNS, raw):
+                values.tofile(self._files[("raw", name)])
+            self.header["counts"]["raw"] += len(raw[0])
+
+        samples = [array.array(code) for _, code, _ in SAMPLE_COLUMNS]
+        t_col, ready_col, total_col, tr_col, br_col, tl_col, bl_col, x_col, y_col = samples
+        t0 = self.t0
+        for sample in self.cursor.drain():
+            t_col.append(sample.t_read - t0)
+            ready_col.append(sample.t_ready - t0)
+            total_col.append(sample.total_kg)
+            tr_col.append(sample.top_right)
+            br_col.append(sample.bottom_right)
+            tl_col.append(sample.top_left)
+            bl_col.append(sample.bottom_left)
+            x_col.append(sample.com_x)
+            y_col.append(sample.com_y)
+        if t_col:
+            for (name, _, _), values in zip(SAMPLE_COLUMNS, samples):
+                values.tofile(self._files[("samples", name)])
+            self.header["counts"]["samples"] += len(t_col)
+
+        self.header["overruns"] = self.cursor.overruns
+        self.header["dropped"] = self.cursor.dropped
+        for f in self._files.values():
+            f.flush()
+
+    def _write_header(self):
+        self._header_dirty = False
+        path = os.path.join(self.session_dir, HEADER_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.header, f, indent=4)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,269 @@
+"""
+Reads sessions written by wbb_session.SessionRecorder.
+
+Every column is memory-mapped, so opening an hours-long session is
+instant and the arrays below are views onto the files, not copies:
+
+    session = Session("sessions/session_20240101_120000")
+    session.samples["total_kg"]                   # numpy view
+    session.press_duration_histogram("top_left")
+    session.reprocess(averaging_samples=10)       # offline re-run
+    session.reprocess(filter_name="ema", filter_params={"alpha": 0.2})
+
+numpy is only needed for this module, not for the GUI:
+
+    pip install numpy
+"""
+import argparse
+import glob
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError: # Analysis is optional; the GUI does not need numpy
+    np = None
+
+from wbb_input_engine import QUADRANT_KEYS
+from wbb_filters import FILTERS, make_filter
+from wbb_session import HEADER_FILE, RAW_COLUMNS, SAMPLE_COLUMNS, column_path
+
+CORNER_KEYS = ("top_right", "bottom_right", "top_left", "bottom_left") # Calibration order
+
+def _map_column(path, dtype):
+    """Read-only view of one column file (empty files can't be mapped)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+class Session:
+    """One recorded session, with raw and processed columns as numpy views."""
+    def __init__(self, session_dir):
+        if np is None:
+            raise ImportError("wbb_session_reader needs numpy (pip install numpy)")
+        self.session_dir = session_dir
+        with open(os.path.join(session_dir, HEADER_FILE), "r") as f:
+            self.header = json.load(f)
+
+        order = "<" if self.header.get("byteorder", "little") == "little" else ">"
+        self.raw = self._map_stream("raw", RAW_COLUMNS, order)
+        self.samples = self._map_stream("samples", SAMPLE_COLUMNS, order)
+
+    def _map_stream(self, stream, columns, order):
+        mapped = {
+            name: _map_column(column_path(self.session_dir, stream, name), order + dtype)
+            for name, _, dtype in columns
+        }
+        # A crash can leave columns one flush apart; trim to the shortest
+        length = min(len(values) for values in mapped.values())
+        return {name: values[:length] for name, values in mapped.items()}
+
+    def __len__(self):
+        return len(self.samples["t"])
+
+    @property
+    def duration_sec(self):
+        t = self.samples["t"]
+        return float(t[-1] - t[0]) if len(t) else 0.0
+
+    def thresholds(self, thresholds=None):
+        """Per-corner thresholds: explicit ones, else the profile's at record time."""
+        thresholds = thresholds or self.header.get("button_thresholds_kg", {})
+        return {key: thresholds.get(key, 10.0) for key in QUADRANT_KEYS}
+
+    # --- Presses ---
+    def pressed(self, corner, threshold=None, samples=None):
+        """Boolean array: corner above its threshold, the same test the engine uses."""
+        samples = self.samples if samples is None else samples
+        if threshold is None:
+            threshold = self.thresholds()[corner]
+        return samples[corner] > threshold
+
+    def press_events(self, corner, threshold=None, samples=None):
+        """(start, end) sample indices of each press; end is exclusive."""
+        pressed = self.pressed(corner, threshold, samples).view(np.int8)
+        edges = np.diff(pressed, prepend=0, append=0)
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    def press_durations(self, corner, threshold=None, samples=None):
+        """Seconds from the first to the last sample of each press."""
+        samples = self.samples if samples is None else samples
+        starts, ends = self.press_events(corner, threshold, samples)
+        t = samples["t"]
+        return t[ends - 1] - t[starts]
+
+    def press_duration_histogram(self, corner, bins=20, threshold=None, samples=None):
+        """np.histogram of press durations (seconds) for one corner."""
+        return np.histogram(self.press_durations(corner, threshold, samples), bins=bins)
+
+    def threshold_crossings(self, corner, threshold=None, samples=None):
+        """Number of times the corner went from below to above the threshold."""
+        return len(self.press_events(corner, threshold, samples)[0])
+
+    # --- Center of mass ---
+    def com_path_length(self, samples=None):
+        """
+        Distance travelled by the CoM in normalized (-1..1) units, only
+        counting steps between two loaded samples.
+        """
+        samples = self.samples if samples is None else samples
+        loaded = samples["total_kg"] > 0.0
+        steps = loaded[1:] & loaded[:-1]
+        dx = np.diff(samples["com_x"])
+        dy = np.diff(samples["com_y"])
+        return float(np.hypot(dx, dy, dtype=np.float64)[steps].sum())
+
+    # --- Offline re-run ---
+    def calculate_weights(self, zero_point, calibration=None, start=0, end=None):
+        """Vectorized SensorKernel.calculate_weights over raw reports [start:end]: (N, 4) kg."""
+        calibration = calibration or self.header["calibration"]
+        end = len(self.raw["t"]) if end is None else end
+        weights = np.zeros((end - start, 4))
+        for i, key in enumerate(CORNER_KEYS):
+            cal_0 = calibration[0][i]
+            delta_17 = calibration[1][i] - cal_0
+            delta_upper = calibration[2][i] - cal_0 - delta_17
+            if delta_17 == 0:
+                continue
+            raw_diff = self.raw[key][start:end] - zero_point[i]
+            upper = 17.0 + 17.0 * ((raw_diff - delta_17) / delta_upper) if delta_upper else 0.0
+            weight = np.where(raw_diff < delta_17, 17.0 * (raw_diff / delta_17), upper)
+            weights[:, i] = np.maximum(weight, 0.0)
+        return weights
+
+    @staticmethod
+    def smooth(weights, averaging_samples):
+        """Trailing moving average like SensorKernel.smooth, including the warm-up."""
+        window = max(1, int(averaging_samples))
+        sums = np.cumsum(weights, axis=0)
+        sums = np.vstack((np.zeros((1, weights.shape[1])), sums))
+        index = np.arange(1, len(weights) + 1)
+        lower = np.maximum(index - window, 0)
+        counts = (index - lower)[:, None]
+        return (sums[index] - sums[lower]) / counts
+
+    @staticmethod
+    def apply_filter(weights, filter_name, filter_params=None):
+        """
+        Runs a wbb_filters filter over (N, 4) weights, report by report like
+        SensorKernel.smooth. Returns None for the moving average (see smooth).
+        """
+        smoothing = make_filter(filter_name, filter_params)
+        if smoothing is None:
+            return None
+        apply = smoothing.apply
+        return np.array([apply(row) for row in weights.tolist()]).reshape(weights.shape)
+
+    def reprocess(self, averaging_samples=None, dead_zone_kg=None, zero_point=None, calibration=None,
+                  filter_name=None, filter_params=None):
+        """
+        Re-runs calibration, smoothing and CoM over the raw reports with
+        different parameters. Returns columns shaped like self.samples.
+
+        Smoothing is the filter recorded in the header unless filter_name
+        is given; averaging_samples only applies to "moving_average".
+        Every raw report after a tare is processed, with smoothing reset at
+        each tare, which is the pipeline at its full report rate. Drift
+        corrections ("zero_updates") switch the zero point without a reset.
+        Pass zero_point to use one zero point for the whole session.
+        """
+        header = self.header
+        averaging_samples = averaging_samples or header.get("averaging_samples", 5)
+        if dead_zone_kg is None:
+            dead_zone_kg = header.get("dead_zone_kg", 0.2)
+        if filter_name is None:
+            filter_name = header.get("filter", "moving_average")
+            filter_params = header.get("filter_params", {}) if filter_params is None else filter_params
+
+        t = self.raw["t"]
+        if zero_point is not None:
+            tares = [{"t": float(t[0]) if len(t) else 0.0, "zero_point": zero_point}]
+            zero_updates = []
+        else:
+            tares = header.get("tares", [])
+            zero_updates = header.get("zero_updates", [])
+
+        segments = []
+        bounds = [np.searchsorted(t, tare["t"]) for tare in tares] + [len(t)]
+        for tare, start, end in zip(tares, bounds, bounds[1:]):
+            if end > start:
+                # Drift corrections change the zero point mid-segment, but
+                # (like on the board) don't restart the smoothing
+                zeros = [(start, tare["zero_point"])]
+                for update in zero_updates:
+                    index = np.searchsorted(t, update["t"])
+                    if start < index < end:
+                        zeros.append((index, update["zero_point"]))
+                zero_bounds = [index for index, _ in zeros] + [end]
+                weights = np.vstack([
+                    self.calculate_weights(zero, calibration, lo, hi)
+                    for (_, zero), lo, hi in zip(zeros, zero_bounds, zero_bounds[1:])
+                ])
+                smoothed = self.apply_filter(weights, filter_name, filter_params)
+                if smoothed is None:
+                    smoothed = self.smooth(weights, averaging_samples)
+                segments.append((start, end, smoothed))
+
+        if not segments:
+            return {name: np.empty(0) for name, _, _ in SAMPLE_COLUMNS}
+        index = np.concatenate([np.arange(start, end) for start, end, _ in segments])
+        averaged = np.vstack([segment for _, _, segment in segments])
+
+        total = averaged.sum(axis=1)
+        loaded = total >= dead_zone_kg
+        averaged[~loaded] = 0.0
+        total[~loaded] = 0.0
+        tr, br, tl, bl = averaged.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            com_x = np.where(loaded, np.clip(((tr + br) - (tl + bl)) / total, -1.0, 1.0), 0.0)
+            com_y = np.where(loaded, np.clip(((tr + tl) - (br + bl)) / total, -1.0, 1.0), 0.0)
+
+        return {
+            "t": t[index], "t_ready": t[index], "total_kg": total,
+            "top_right": tr, "bottom_right": br, "top_left": tl, "bottom_left": bl,
+            "com_x": com_x, "com_y": com_y,
+        }
+
+    def summary(self, samples=None):
+        """Plain-dict overview of the session, e.g. for printing."""
+        samples = self.samples if samples is None else samples
+        loaded = samples["total_kg"] > 0.0
+        return {
+            "samples": len(samples["t"]),
+            "raw_reports": len(self.raw["t"]),
+            "duration_sec": self.duration_sec,
+            "loaded_fraction": float(loaded.mean()) if len(loaded) else 0.0,
+            "com_path_length": self.com_path_length(samples),
+            "presses": {key: self.threshold_crossings(key, samples=samples) for key in QUADRANT_KEYS},
+            "overruns": self.header.get("overruns", 0),
+        }
+
+def open_sessions(root="sessions"):
+    """Yields every session under root, oldest first."""
+    for header_path in sorted(glob.glob(os.path.join(root, "*", HEADER_FILE))):
+        yield Session(os.path.dirname(header_path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize recorded balance board sessions.")
+    parser.add_argument("sessions", nargs="*", help="Session directories (default: all under sessions/)")
+    parser.add_argument("--averaging-samples", type=int, help="Re-run smoothing with this window")
+    parser.add_argument("--dead-zone-kg", type=float, help="Re-run with this dead zone")
+    parser.add_argument("--filter", choices=FILTERS,
+                        help="Re-run with this filter (default: the one the session was recorded with)")
+    args = parser.parse_args()
+
+    sessions = [Session(path) for path in args.sessions] if args.sessions else open_sessions()
+    for session in sessions:
+        samples = None
+        if args.averaging_samples or args.dead_zone_kg is not None or args.filter:
+            filter_name = args.filter or session.header.get("filter", "moving_average")
+            if args.averaging_samples and filter_name != "moving_average":
+                print(f"Note: {session.session_dir} was recorded with the {filter_name} filter; "
+                      f"--averaging-samples only applies with --filter moving_average")
+            samples = session.reprocess(args.averaging_samples, args.dead_zone_kg, filter_name=args.filter)
+        print(session.session_dir)
+        for key, value in session.summary(samples).items():
+            print(f"    {key}: {value}")
+
+if __name__ == "__main__":
+    main()
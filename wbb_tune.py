@@ -0,0 +1,228 @@
+"""
+Offline tuning of thresholds, dead zone and smoothing over recorded sessions.
+
+Every combination of averaging_samples x dead_zone_kg is re-run over the
+raw reports of each session (in parallel across processes), and every
+threshold is scored per corner against reference presses. If the profile
+uses one of the wbb_filters filters, the sessions are re-run with that
+filter and averaging_samples (which it ignores) is not swept:
+
+    python wbb_tune.py sessions/session_* --profile profiles/PDAFT.json \\
+        --thresholds 5:20:0.5 --windows 1,2,3,5,8 --dead-zones 0.1,0.2,0.5 \\
+        --output profiles/PDAFT_tuned.json
+
+Reference presses come from a centered (zero-lag) average of the raw
+weights above --reference-kg, ignoring blips shorter than --min-press-ms.
+For each setting we count, per corner:
+    false    presses with no reference press under them
+    missed   reference presses nothing fired for
+    chatter  extra presses fired within one reference press
+    latency  mean delay of the first press after the reference start (ms),
+             over every reference press that was hit ("-" if none was)
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from wbb_input_engine import QUADRANT_KEYS
+from wbb_session_reader import Session
+
+METRICS = ("false", "missed", "chatter", "latency_ms")
+
+def _intervals(pressed):
+    """(starts, ends) of runs of True; ends are exclusive."""
+    edges = np.diff(pressed.view(np.int8), prepend=0, append=0)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def reference_presses(session, reference_kg, min_press_sec, window=9):
+    """
+    Intended presses per corner: centered moving average of the unsmoothed
+    kg above reference_kg, at least min_press_sec long. Uses the same index
+    space as Session.reprocess() (raw reports after the first tare).
+    """
+    unsmoothed = session.reprocess(averaging_samples=1, dead_zone_kg=0.0, filter_name="moving_average")
+    t = unsmoothed["t"]
+    kernel = np.ones(window) / window
+    references = {}
+    for key in QUADRANT_KEYS:
+        centered = np.convolve(unsmoothed[key], kernel, mode="same")
+        starts, ends = _intervals(centered > reference_kg[key])
+        keep = (t[ends - 1] - t[starts]) >= min_press_sec
+        references[key] = (starts[keep], ends[keep])
+    return references, t
+
+def score_presses(candidate, reference, t):
+    """Metrics for one corner and threshold. Both arguments are (starts, ends)."""
+    starts, ends = candidate
+    ref_starts, ref_ends = reference
+
+    # Reference press each candidate overlaps (references don't overlap each other)
+    index = np.searchsorted(ref_ends, starts, side="right")
+    valid = index < len(ref_starts)
+    overlaps = np.zeros(len(starts), dtype=bool)
+    overlaps[valid] = ref_starts[index[valid]] < ends[valid]
+
+    hits = index[overlaps]
+    per_reference = np.bincount(hits, minlength=len(ref_starts))
+    first_hit, first = np.unique(hits, return_index=True)
+    delays = t[starts[overlaps][first]] - t[ref_starts[first_hit]]
+
+    return {
+        "false": int((~overlaps).sum()),
+        "missed": int((per_reference == 0).sum()),
+        "chatter": int(np.maximum(per_reference - 1, 0).sum()),
+        "latency_ms": float(delays.mean() * 1000) if len(delays) else None,
+        "hits": len(delays),
+    }
+
+def evaluate(task):
+    """
+    Worker: one session at one (averaging_samples, dead_zone_kg) with the
+    given filter. Returns {corner: [metrics for each threshold]}.
+    """
+    (session_dir, averaging_samples, dead_zone_kg, filter_name, filter_params,
+     thresholds, reference_kg, min_press_sec) = task
+    session = Session(session_dir)
+    if not session.header.get("tares"):
+        return None
+    references, t = reference_presses(session, reference_kg, min_press_sec)
+
+    samples = session.reprocess(averaging_samples, dead_zone_kg,
+                                filter_name=filter_name, filter_params=filter_params)
+    return {
+        key: [
+            score_presses(_intervals(samples[key] > threshold), references[key], t)
+            for threshold in thresholds
+        ]
+        for key in QUADRANT_KEYS
+    }
+
+def _score(metrics, weights):
+    # No hits means no latency to weigh; the misses already count against it
+    latency_ms = metrics["latency_ms"] or 0.0
+    return (
+        weights["false"] * metrics["false"] + weights["missed"] * metrics["missed"] +
+        weights["chatter"] * metrics["chatter"] + weights["latency_ms"] * latency_ms
+    )
+
+def sweep(session_dirs, thresholds, windows, dead_zones, reference_kg, min_press_sec, jobs=None,
+          filter_name="moving_average", filter_params=None):
+    """
+    Runs the whole grid. Returns {(window, dead_zone): {corner: [metrics per threshold]}}
+    with counts summed and latency averaged over the hits of every session.
+    """
+    grid = [(w, dz) for w in windows for dz in dead_zones]
+    tasks = [
+        (path, w, dz, filter_name, filter_params, thresholds, reference_kg, min_press_sec)
+        for w, dz in grid for path in session_dirs
+    ]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        outputs = list(pool.map(evaluate, tasks))
+
+    results = {}
+    for (path, w, dz, *_), output in zip(tasks, outputs):
+        if output is None:
+            print(f"Skipping {path}: no tare recorded")
+            continue
+        merged = results.setdefault((w, dz), {key: None for key in QUADRANT_KEYS})
+        for key in QUADRANT_KEYS:
+            if merged[key] is None:
+                merged[key] = [dict(m) for m in output[key]]
+                continue
+            for total, m in zip(merged[key], output[key]):
+                for metric in ("false", "missed", "chatter"):
+                    total[metric] += m[metric]
+                hits = total["hits"] + m["hits"]
+                if m["hits"]:
+                    delay_sum = (total["latency_ms"] or 0.0) * total["hits"] + m["latency_ms"] * m["hits"]
+                    total["latency_ms"] = delay_sum / hits
+                total["hits"] = hits
+    return results
+
+def best_settings(results, thresholds, weights):
+    """Picks the grid point and per-corner thresholds with the lowest total score."""
+    best = None
+    for (window, dead_zone), corners in results.items():
+        choice = {}
+        total = 0.0
+        for key in QUADRANT_KEYS:
+            scores = [_score(m, weights) for m in corners[key]]
+            i = int(np.argmin(scores))
+            choice[key] = (thresholds[i], corners[key][i])
+            total += scores[i]
+        if best is None or total < best[0]:
+            best = (total, window, dead_zone, choice)
+    return best
+
+def _parse_range(text):
+    """'5:20:0.5' -> 5.0, 5.5, ... 20.0; '1,2,3' -> [1, 2, 3]."""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        return [round(v, 6) for v in np.arange(start, stop + step / 2, step)]
+    return [float(v) for v in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune thresholds and smoothing from recorded sessions.")
+    parser.add_argument("sessions", nargs="+", help="Session directories (see wbb_session)")
+    parser.add_argument("--profile", default="profiles/PDAFT.json", help="Base profile to copy settings into")
+    parser.add_argument("--output", help="Profile JSON to write (default: <profile>_tuned.json)")
+    parser.add_argument("--thresholds", default="4:20:0.5", help="start:stop:step or a comma list (kg)")
+    parser.add_argument("--windows", default="1,2,3,4,5,6,8,10", help="averaging_samples values")
+    parser.add_argument("--dead-zones", default="0.1,0.2,0.3,0.5", help="dead_zone_kg values")
+    parser.add_argument("--reference-kg", type=float,
+                        help="Load that counts as an intended press (default: the profile thresholds)")
+    parser.add_argument("--min-press-ms", type=float, default=60.0, help="Shortest intended press")
+    parser.add_argument("--latency-weight", type=float, default=0.02,
+                        help="Score per ms of latency; false/missed/chatter presses score 1 each")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    with open(args.profile, "r") as f:
+        profile = json.load(f)
+    profile_thresholds = profile.get("button_thresholds_kg", {})
+    reference_kg = {
+        key: args.reference_kg if args.reference_kg is not None else profile_thresholds.get(key, 10.0)
+        for key in QUADRANT_KEYS
+    }
+
+    thresholds = _parse_range(args.thresholds)
+    windows = [int(w) for w in _parse_range(args.windows)]
+    dead_zones = _parse_range(args.dead_zones)
+    filter_name = profile.get("filter", "moving_average")
+    filter_params = profile.get("filter_params", {})
+    if filter_name != "moving_average":
+        # The filter replaces the moving average, so its window doesn't matter
+        windows = [profile.get("averaging_samples", 5)]
+        print(f"The profile uses the {filter_name} filter; sweeping thresholds and dead zones only.")
+    weights = {"false": 1.0, "missed": 1.0, "chatter": 1.0, "latency_ms": args.latency_weight}
+
+    print(f"Sweeping {len(windows) * len(dead_zones)} smoothing settings x "
+          f"{len(thresholds)} thresholds over {len(args.sessions)} sessions...")
+    results = sweep(args.sessions, thresholds, windows, dead_zones, reference_kg,
+                    args.min_press_ms / 1000.0, args.jobs, filter_name, filter_params)
+    if not results:
+        raise SystemExit("No usable sessions (each needs a recorded tare).")
+
+    score, window, dead_zone, choice = best_settings(results, thresholds, weights)
+    smoothing = f"averaging_samples={window}" if filter_name == "moving_average" else f"filter={filter_name}"
+    print(f"Best: {smoothing}, dead_zone_kg={dead_zone} (score {score:.2f})")
+    print(f"{'corner':<14}{'kg':>6}" + "".join(f"{m:>12}" for m in METRICS))
+    for key in QUADRANT_KEYS:
+        threshold, m = choice[key]
+        print(f"{key:<14}{threshold:>6.1f}" + "".join(
+            f"{m[metric]:>12.1f}" if m[metric] is not None else f"{'-':>12}" for metric in METRICS
+        ))
+
+    profile["averaging_samples"] = window
+    profile["dead_zone_kg"] = dead_zone
+    profile["button_thresholds_kg"] = {key: choice[key][0] for key in QUADRANT_KEYS}
+    output = args.output or os.path.splitext(args.profile)[0] + "_tuned.json"
+    with open(output, "w") as f:
+        json.dump(profile, f, indent=4)
+    print(f"Profile written to {output}")
+
+if __name__ == "__main__":
+    main()
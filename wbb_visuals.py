@@ -1,10 +1,55 @@
 from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsEllipseItem
-from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtCore import Qt, QPointF, QRectF, QLineF
 from PyQt6.QtGui import QFont, QColor, QPen, QBrush, QPainter
 
 # --- STYLESHEETS REMOVED ---
 # They are now in the themes/ folder as .json files
 
+# --- CoMWidget colors per theme "base"; a theme can override any of them ---
+# with a "com_widget" object, e.g. {"base": "dark", "com_widget": {"grid": "#3a3c4e"}}
+COM_THEME_DEFAULTS = {
+    "light": {
+        "background": "#ffffff", "grid": "#e6e6e6", "axis": "#c0c0c0", "text": "#000000",
+        "threshold": "#646464", "inactive": "#0000ff", "active": "#dc0000", "com": "#ff0000",
+    },
+    "dark": {
+        "background": "#282a36", "grid": "#44475a", "axis": "#6272a4", "text": "#f8f8f2",
+        "threshold": "#bd93f9", "inactive": "#0000ff", "active": "#dc0000", "com": "#ff0000",
+    },
+}
+
+class ComTheme:
+    """CoMWidget colors compiled once into the pens and brushes it draws with."""
+    def __init__(self, colors):
+        self.key = tuple(sorted(colors.items())) # Equal keys draw identically
+        self.background = QColor(colors["background"])
+        self.grid_pen = QPen(QColor(colors["grid"]), 1, Qt.PenStyle.SolidLine)
+        self.axis_pen = QPen(QColor(colors["axis"]), 1, Qt.PenStyle.DashLine)
+        self.text_color = QColor(colors["text"])
+        self.thresh_pen = QPen(QColor(colors["threshold"]), 1, Qt.PenStyle.DashLine)
+        for pen in (self.grid_pen, self.axis_pen, self.thresh_pen):
+            pen.setCosmetic(True) # Keep it 1px
+        
+        inactive, active = QColor(colors["inactive"]), QColor(colors["active"])
+        self.inactive_pressure_brush = QBrush(QColor(inactive.red(), inactive.green(), inactive.blue(), 120))
+        self.inactive_pressure_pen = QPen(QColor(inactive.red(), inactive.green(), inactive.blue(), 180), 1)
+        self.active_pressure_brush = QBrush(QColor(active.red(), active.green(), active.blue(), 120))
+        self.active_pressure_pen = QPen(QColor(active.red(), active.green(), active.blue(), 180), 1)
+        self.com_brush = QBrush(QColor(colors["com"]))
+        self.com_pen = QPen(QColor(colors["com"]))
+
+class CompiledTheme:
+    """
+    A themes/*.json file parsed once: the stylesheet for the window and
+    the CoMWidget pens. The GUI caches one per theme name.
+    """
+    def __init__(self, theme_data):
+        self.stylesheet = theme_data.get("stylesheet", "")
+        self.base = theme_data.get("base", "light")
+        colors = dict(COM_THEME_DEFAULTS.get(self.base, COM_THEME_DEFAULTS["light"]))
+        colors.update(theme_data.get("com_widget", {}))
+        self.com = ComTheme(colors)
+
 class CoMWidget(QGraphicsView):
     """
     A custom widget to display the Center of Mass,
@@ -20,36 +65,20 @@ class CoMWidget(QGraphicsView):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         
-        self.inactive_pressure_brush = QBrush(QColor(0, 0, 255, 120))
-        self.inactive_pressure_pen = QPen(QColor(0, 0, 255, 180), 1)
-        self.active_pressure_brush = QBrush(QColor(220, 0, 0, 120)) # Red
-        self.active_pressure_pen = QPen(QColor(220, 0, 0, 180), 1) # Red
-
-        self.bg_color = QColor(255, 255, 255)
-        self.grid_pen = QPen(QColor(230, 230, 230), 1, Qt.PenStyle.SolidLine)
-        self.axis_pen = QPen(Qt.GlobalColor.lightGray, 1, Qt.PenStyle.DashLine)
-        self.label_font_color = QColor(0, 0, 0)
-        self.thresh_pen = QPen(QColor(100, 100, 100), 1, Qt.PenStyle.DashLine)
-        
-        self.setBackgroundBrush(self.bg_color)
+        self.theme = ComTheme(COM_THEME_DEFAULTS["light"])
         
-        self.grid_lines = []
-        self.axis_lines = []
         self.text_items = []
         
-        self.grid_pen.setCosmetic(True) # Keep it 1px
+        # Grid and axes are painted in drawBackground (not one item per line),
+        # cached as a pixmap and only redrawn on resize or theme change
+        self._grid_lines = []
         for i in range(-10, 11):
             if i == 0: continue
             coord = i * 10
-            self.grid_lines.append(self.scene.addLine(-100, coord, 100, coord, self.grid_pen))
-            self.grid_lines.append(self.scene.addLine(coord, -100, coord, 100, self.grid_pen))
-            self.grid_lines[-1].setZValue(-10)
-            self.grid_lines[-2].setZValue(-10)
-
-        self.axis_lines.append(self.scene.addLine(-100, 0, 100, 0, self.axis_pen))
-        self.axis_lines.append(self.scene.addLine(0, -100, 0, 100, self.axis_pen))
-        self.axis_lines[0].setZValue(-5)
-        self.axis_lines[1].setZValue(-5)
+            self._grid_lines.append(QLineF(-100, coord, 100, coord))
+            self._grid_lines.append(QLineF(coord, -100, coord, 100))
+        self._axis_lines = [QLineF(-100, 0, 100, 0), QLineF(0, -100, 0, 100)]
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
         
         font = QFont("Helvetica", 8)
         top_label = self.scene.addText("Top (+Y)", font)
@@ -65,35 +94,46 @@ class CoMWidget(QGraphicsView):
         right_label.setPos(98 - right_label.boundingRect().width(), -right_label.boundingRect().height() / 2)
         
         self.text_items.extend([top_label, bottom_label, left_label, right_label])
+        for item in self.text_items:
+            item.setDefaultTextColor(self.theme.text_color)
         
         min_r = self._map_weight_to_radius(0)
         
-        self.tl_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, self.inactive_pressure_pen, self.inactive_pressure_brush)
+        theme = self.theme
+        self.tl_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, theme.inactive_pressure_pen, theme.inactive_pressure_brush)
         self.tl_dot.setPos(-90, -90); self.tl_dot.setZValue(5)
         
-        self.tr_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, self.inactive_pressure_pen, self.inactive_pressure_brush)
+        self.tr_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, theme.inactive_pressure_pen, theme.inactive_pressure_brush)
         self.tr_dot.setPos(90, -90); self.tr_dot.setZValue(5)
         
-        self.bl_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, self.inactive_pressure_pen, self.inactive_pressure_brush)
+        self.bl_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, theme.inactive_pressure_pen, theme.inactive_pressure_brush)
         self.bl_dot.setPos(-90, 90); self.bl_dot.setZValue(5)
         
-        self.br_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, self.inactive_pressure_pen, self.inactive_pressure_brush)
+        self.br_dot = self.scene.addEllipse(0, 0, min_r * 2, min_r * 2, theme.inactive_pressure_pen, theme.inactive_pressure_brush)
         self.br_dot.setPos(90, 90); self.br_dot.setZValue(5)
 
-        self.thresh_pen.setCosmetic(True)
+        self.pressure_dots = {
+            "top_left": self.tl_dot, "top_right": self.tr_dot,
+            "bottom_left": self.bl_dot, "bottom_right": self.br_dot
+        }
+        # Last drawn (radius, pressed) per dot, so unchanged items aren't touched
+        self._dot_state = {key: (min_r, False) for key in self.pressure_dots}
+        self._com_pos = None
+
         thresh_brush = QBrush(Qt.BrushStyle.NoBrush)
         
-        self.tl_thresh = self.scene.addEllipse(0, 0, 0, 0, self.thresh_pen, thresh_brush)
+        self.tl_thresh = self.scene.addEllipse(0, 0, 0, 0, theme.thresh_pen, thresh_brush)
         self.tl_thresh.setPos(-90, -90); self.tl_thresh.setZValue(3)
 
-        self.tr_thresh = self.scene.addEllipse(0, 0, 0, 0, self.thresh_pen, thresh_brush)
+        self.tr_thresh = self.scene.addEllipse(0, 0, 0, 0, theme.thresh_pen, thresh_brush)
         self.tr_thresh.setPos(90, -90); self.tr_thresh.setZValue(3)
 
-        self.bl_thresh = self.scene.addEllipse(0, 0, 0, 0, self.thresh_pen, thresh_brush)
+        self.bl_thresh = self.scene.addEllipse(0, 0, 0, 0, theme.thresh_pen, thresh_brush)
         self.bl_thresh.setPos(-90, 90); self.bl_thresh.setZValue(3)
 
-        self.br_thresh = self.scene.addEllipse(0, 0, 0, 0, self.thresh_pen, thresh_brush)
+        self.br_thresh = self.scene.addEllipse(0, 0, 0, 0, theme.thresh_pen, thresh_brush)
         self.br_thresh.setPos(90, 90); self.br_thresh.setZValue(3)
+        self.thresh_items = (self.tl_thresh, self.tr_thresh, self.bl_thresh, self.br_thresh)
 
         self.label_font = QFont("Helvetica", 16, QFont.Weight.Bold)
         
@@ -111,45 +151,54 @@ class CoMWidget(QGraphicsView):
         self.br_label = create_button_label("", 90, 90)
 
         self.com_dot = QGraphicsEllipseItem(-2, -2, 4, 4)
-        self.com_dot.setBrush(QBrush(Qt.GlobalColor.red))
-        self.com_dot.setPen(QPen(Qt.GlobalColor.red))
+        self.com_dot.setBrush(theme.com_brush)
+        self.com_dot.setPen(theme.com_pen)
         self.com_dot.setZValue(10)
         self.scene.addItem(self.com_dot)
         
         self.setRenderHint(QPainter.RenderHint.Antialiasing)
 
-    def set_theme(self, is_dark_mode):
-        if is_dark_mode:
-            self.bg_color = QColor("#282a36")
-            self.grid_pen = QPen(QColor("#44475a"), 1, Qt.PenStyle.SolidLine)
-            self.axis_pen = QPen(QColor("#6272a4"), 1, Qt.PenStyle.DashLine)
-            self.label_font_color = QColor("#f8f8f2")
-            self.thresh_pen = QPen(QColor("#bd93f9"), 1, Qt.PenStyle.DashLine)
-        else:
-            self.bg_color = QColor(255, 255, 255)
-            self.grid_pen = QPen(QColor(230, 230, 230), 1, Qt.PenStyle.SolidLine)
-            self.axis_pen = QPen(Qt.GlobalColor.lightGray, 1, Qt.PenStyle.DashLine)
-            self.label_font_color = QColor(0, 0, 0)
-            self.thresh_pen = QPen(QColor(100, 100, 100), 1, Qt.PenStyle.DashLine)
-            
-        self.grid_pen.setCosmetic(True)
-        self.thresh_pen.setCosmetic(True)
-
-        self.setBackgroundBrush(self.bg_color)
+    def set_theme(self, theme):
+        """
+        Switches to a ComTheme (see CompiledTheme). Only items whose colors
+        differ are touched; the grid is just repainted once.
+        """
+        old = self.theme
+        if theme.key == old.key:
+            return
+        self.theme = theme
         
-        for item in self.grid_lines:
-            item.setPen(self.grid_pen)
+        # Grid, axes and background: one repaint of the cached background
+        self.resetCachedContent()
+        self.viewport().update()
         
-        for item in self.axis_lines:
-            item.setPen(self.axis_pen)
-            
-        for item in self.text_items:
-            item.setDefaultTextColor(self.label_font_color)
-            
-        self.tl_thresh.setPen(self.thresh_pen)
-        self.tr_thresh.setPen(self.thresh_pen)
-        self.bl_thresh.setPen(self.thresh_pen)
-        self.br_thresh.setPen(self.thresh_pen)
+        if theme.text_color != old.text_color:
+            for item in self.text_items:
+                item.setDefaultTextColor(theme.text_color)
+        
+        if theme.thresh_pen != old.thresh_pen:
+            for item in self.thresh_items:
+                item.setPen(theme.thresh_pen)
+        
+        if (theme.active_pressure_pen != old.active_pressure_pen
+                or theme.inactive_pressure_pen != old.inactive_pressure_pen):
+            for key, dot in self.pressure_dots.items():
+                pressed = self._dot_state[key][1]
+                dot.setBrush(theme.active_pressure_brush if pressed else theme.inactive_pressure_brush)
+                dot.setPen(theme.active_pressure_pen if pressed else theme.inactive_pressure_pen)
+        
+        if theme.com_pen != old.com_pen:
+            self.com_dot.setBrush(theme.com_brush)
+            self.com_dot.setPen(theme.com_pen)
+
+    def drawBackground(self, painter, rect):
+        """Background, grid and axes from the current theme's pens."""
+        theme = self.theme
+        painter.fillRect(rect, theme.background)
+        painter.setPen(theme.grid_pen)
+        painter.drawLines(self._grid_lines)
+        painter.setPen(theme.axis_pen)
+        painter.drawLines(self._axis_lines)
 
     def _map_weight_to_radius(self, weight):
         min_weight = 0.5
@@ -241,33 +290,23 @@ class CoMWidget(QGraphicsView):
         self.bl_thresh.setRect(-bl_r, -bl_r, bl_r * 2, bl_r * 2)
         self.br_thresh.setRect(-br_r, -br_r, br_r * 2, br_r * 2)
 
-    def update_dot(self, x, y, quadrants, press_states):
-        canvas_x = x * 90 
-        canvas_y = y * -90
-        self.com_dot.setPos(canvas_x, canvas_y)
+    def update_dot(self, sample, press_states):
+        # Rounded to what is visible at this widget's size
+        com_pos = (round(sample.com_x * 90, 1), round(sample.com_y * -90, 1))
+        if com_pos != self._com_pos:
+            self._com_pos = com_pos
+            self.com_dot.setPos(*com_pos)
         
-        tl_r = self._map_weight_to_radius(quadrants['top_left'])
-        tr_r = self._map_weight_to_radius(quadrants['top_right'])
-        bl_r = self._map_weight_to_radius(quadrants['bottom_left'])
-        br_r = self._map_weight_to_radius(quadrants['bottom_right'])
-        
-        tl_pressed = press_states['top_left']
-        self.tl_dot.setBrush(self.active_pressure_brush if tl_pressed else self.inactive_pressure_brush)
-        self.tl_dot.setPen(self.active_pressure_pen if tl_pressed else self.inactive_pressure_pen)
-        
-        tr_pressed = press_states['top_right']
-        self.tr_dot.setBrush(self.active_pressure_brush if tr_pressed else self.inactive_pressure_brush)
-        self.tr_dot.setPen(self.active_pressure_pen if tr_pressed else self.inactive_pressure_pen)
-        
-        bl_pressed = press_states['bottom_left']
-        self.bl_dot.setBrush(self.active_pressure_brush if bl_pressed else self.inactive_pressure_brush)
-        self.bl_dot.setPen(self.active_pressure_pen if bl_pressed else self.inactive_pressure_pen)
-
-        br_pressed = press_states['bottom_right']
-        self.br_dot.setBrush(self.active_pressure_brush if br_pressed else self.inactive_pressure_brush)
-        self.br_dot.setPen(self.active_pressure_pen if br_pressed else self.inactive_pressure_pen)
-
-        self.tl_dot.setRect(-tl_r, -tl_r, tl_r * 2, tl_r * 2)
-        self.tr_dot.setRect(-tr_r, -tr_r, tr_r * 2, tr_r * 2)
-        self.bl_dot.setRect(-bl_r, -bl_r, bl_r * 2, bl_r * 2)
-        self.br_dot.setRect(-br_r, -br_r, br_r * 2, br_r * 2)
\ No newline at end of file
+        for key, dot in self.pressure_dots.items():
+            radius = round(self._map_weight_to_radius(getattr(sample, key)), 1)
+            pressed = press_states[key]
+            last_radius, last_pressed = self._dot_state[key]
+            
+            if pressed != last_pressed:
+                theme = self.theme
+                dot.setBrush(theme.active_pressure_brush if pressed else theme.inactive_pressure_brush)
+                dot.setPen(theme.active_pressure_pen if pressed else theme.inactive_pressure_pen)
+            if radius != last_radius:
+                dot.setRect(-radius, -radius, radius * 2, radius * 2)
+            
+            self._dot_state[key] = (radius, pressed)